@@ -0,0 +1,239 @@
+import datetime
+import json
+import os
+import sqlite3
+import sys
+from typing import List, Dict, Any, Optional
+
+import requests
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.pm_market_getter import get_raw_events_for_date_range, iter_raw_events
+from agent.market_records import Event
+from agent.scoring import score_events
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "events.sqlite3")
+
+WATERMARK_KEY = "updated_at_watermark:{days_in_past}d"
+SYNCED_AT_KEY = "synced_at:{days_in_past}d"
+
+
+def _parse_timestamp(value) -> Optional[datetime.datetime]:
+    """Parse a Gamma ISO timestamp into an aware UTC datetime, or None."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
+class EventStore:
+    """
+    Local SQLite store of parsed markets keyed by ticker.
+
+    Each row keeps the parsed market (interest_score included) alongside the
+    event's updatedAt, so a sync can skip events we already hold and readers
+    can pull the top markets without re-downloading anything.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.setup()
+
+    def setup(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                ticker TEXT PRIMARY KEY,
+                updated_at TEXT,
+                start_date TEXT,
+                active INTEGER NOT NULL DEFAULT 1,
+                interest_score REAL NOT NULL DEFAULT 0,
+                market TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_score_idx ON events (active, interest_score DESC);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.conn.commit()
+
+    def get_watermark(self, days_in_past: int) -> Optional[datetime.datetime]:
+        # Watermarks are kept per window size: a 1-day sync says nothing about older events
+        key = WATERMARK_KEY.format(days_in_past=days_in_past)
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return _parse_timestamp(row[0]) if row else None
+
+    def set_watermark(self, days_in_past: int, watermark: datetime.datetime):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (WATERMARK_KEY.format(days_in_past=days_in_past), watermark.isoformat()),
+        )
+        self.conn.commit()
+
+    def get_synced_at(self, days_in_past: int) -> Optional[datetime.datetime]:
+        key = SYNCED_AT_KEY.format(days_in_past=days_in_past)
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return _parse_timestamp(row[0]) if row else None
+
+    def set_synced_at(self, days_in_past: int, synced_at: datetime.datetime):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (SYNCED_AT_KEY.format(days_in_past=days_in_past), synced_at.isoformat()),
+        )
+        self.conn.commit()
+
+    def get_updated_at(self, ticker) -> Optional[str]:
+        row = self.conn.execute("SELECT updated_at FROM events WHERE ticker = ?", (ticker,)).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, ticker: str, market: Event, updated_at: Optional[str],
+               start_date: Optional[str], active: bool):
+        """Store a scored Event record; the market column holds its to_dict() JSON."""
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO events (ticker, updated_at, start_date, active, interest_score, market)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (ticker, updated_at, start_date, int(active),
+             float(market.interest_score), json.dumps(market.to_dict())),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def top_markets(self, k: int, days_in_past: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the k highest scoring active markets, optionally only those started in the last days_in_past days."""
+        query = "SELECT market FROM events WHERE active = 1"
+        args = []
+        if days_in_past is not None:
+            cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days_in_past)
+            query += " AND start_date >= ?"
+            args.append(cutoff.isoformat())
+        query += " ORDER BY interest_score DESC, ticker LIMIT ?"
+        args.append(k)
+        return [json.loads(row[0]) for row in self.conn.execute(query, args)]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def _updated_str(event: Dict[str, Any]) -> Optional[str]:
+    updated_at = _parse_timestamp(event.get("updatedAt"))
+    return updated_at.isoformat() if updated_at else None
+
+
+def _queue_event(store: EventStore, event: Dict[str, Any], pending: Dict[str, Dict[str, Any]],
+                 stats: Dict[str, int]):
+    """Queue one raw event by ticker unless the store or the queue already holds this version of it."""
+    if event.get("ticker") is None:
+        return
+    ticker = str(event["ticker"])
+    updated_str = _updated_str(event)
+    held = _updated_str(pending[ticker]) if ticker in pending else store.get_updated_at(ticker)
+    if updated_str and held == updated_str:
+        stats["skipped"] += 1
+        return
+    pending[ticker] = event
+
+
+def _store_events(store: EventStore, pending: Dict[str, Dict[str, Any]], stats: Dict[str, int]):
+    """Parse, batch-score and upsert the queued raw events, then empty the queue."""
+    records = [Event.from_raw(event) for event in pending.values()]
+    score_events(records)
+    for (ticker, event), record in zip(pending.items(), records):
+        updated_str = _updated_str(event)
+        start_date = _parse_timestamp(event.get("startDate"))
+        active = bool(event.get("active", True)) and not event.get("closed", False)
+        store.upsert(ticker, record, updated_str, start_date.isoformat() if start_date else None, active)
+    stats["parsed"] += len(records)
+    pending.clear()
+
+
+def sync_events(store: EventStore, days_in_past: int = 1, page_size: int = 100,
+                max_workers: int = 8, min_interval: float = 0) -> Dict[str, int]:
+    """
+    Pull only the events that changed since the last sync into the store.
+
+    The first sync of a window size has nothing to stop at, so it downloads the
+    whole range one day window at a time, max_workers windows at once, like
+    get_markets_for_date_range(paginate=True). Later syncs request events
+    newest-updated first and stop paging as soon as they reach the stored
+    watermark. Events whose updatedAt matches what we already hold are not
+    re-parsed. The watermark only advances after a sync completes, so a failed
+    run is simply retried from the same point next time.
+
+    Both requests keep the active=true filter the market getter always used.
+    Closing an event updates it while it stays active, so closed events still
+    come back and are stored as inactive.
+
+    If the last completed sync of this window size finished less than
+    min_interval seconds ago, nothing is requested at all.
+
+    :param store: EventStore to fill
+    :param days_in_past: Only consider events that started within this many days
+    :param page_size: Number of events to request per API call
+    :param max_workers: Number of day windows the first sync requests concurrently
+    :param min_interval: Seconds after a completed sync during which the store is considered fresh
+    :return: Counts of events seen, parsed and skipped
+    """
+    stats = {"seen": 0, "parsed": 0, "skipped": 0}
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    synced_at = store.get_synced_at(days_in_past)
+    if min_interval and synced_at and (started_at - synced_at).total_seconds() < min_interval:
+        print(f"Events synced {(started_at - synced_at).total_seconds():.0f}s ago, skipping sync")
+        return stats
+
+    watermark = store.get_watermark(days_in_past)
+    # Hour-aligned bounds keep the queries identical within the hour, so retrying a
+    # failed first sync can reuse the windows the response cache already holds
+    end_date = datetime.datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    newest = watermark
+    # Changed events are parsed and scored a page at a time, as Event records
+    pending = {}
+    try:
+        if watermark is None:
+            events = get_raw_events_for_date_range(days_in_past, limit=page_size,
+                                                   max_workers=max_workers, end_date=end_date)
+        else:
+            params = {
+                'order': 'updatedAt',
+                'ascending': 'false',
+                'active': 'true',
+                'start_date_min': (end_date - datetime.timedelta(days=days_in_past)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            }
+            events = iter_raw_events(params, page_size)
+
+        for event in events:
+            updated_at = _parse_timestamp(event.get("updatedAt"))
+            if watermark and updated_at and updated_at <= watermark:
+                break
+            stats["seen"] += 1
+            if updated_at and (newest is None or updated_at > newest):
+                newest = updated_at
+            _queue_event(store, event, pending, stats)
+            if len(pending) >= page_size:
+                _store_events(store, pending, stats)
+        _store_events(store, pending, stats)
+    except requests.exceptions.RequestException as e:
+        _store_events(store, pending, stats)
+        store.commit()
+        print(f"An error occurred during sync: {e}")
+        return stats
+
+    store.commit()
+    if newest is not None and newest != watermark:
+        store.set_watermark(days_in_past, newest)
+    store.set_synced_at(days_in_past, started_at)
+    print(f"Synced {stats['parsed']} updated events ({stats['skipped']} unchanged, {store.count()} stored)")
+    return stats
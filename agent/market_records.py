@@ -0,0 +1,171 @@
+import ast
+import json
+from operator import attrgetter
+from typing import Dict, Any
+
+_probability_key = attrgetter("probability")
+
+
+def coerce(value):
+    """
+    Same conversion safe_get applies to a field: float if possible, else the raw value.
+
+    Checks the common types first so the hot path never raises.
+    """
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is str:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+    except OverflowError:
+        return int(value)
+
+
+def lookup(data, key, default="N/A"):
+    """safe_get for a single key, without the bare-except fallbacks."""
+    if isinstance(data, dict) and key in data:
+        return coerce(data[key])
+    return default
+
+
+def to_float(value, default=0):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def parse_string_list(value):
+    """
+    Decode the stringified arrays Gamma returns for outcomes/outcomePrices.
+
+    They are almost always valid JSON, which json.loads handles far faster than
+    ast.literal_eval; anything else (single quotes, tuples) falls back to literal_eval.
+    """
+    if isinstance(value, list):
+        return value
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return ast.literal_eval(value)
+
+
+class Option:
+    __slots__ = ("name", "probability", "last_trade_price", "one_day_price_change")
+
+    def __init__(self, name, probability, last_trade_price, one_day_price_change):
+        self.name = name
+        self.probability = probability
+        self.last_trade_price = last_trade_price
+        self.one_day_price_change = one_day_price_change
+
+    @classmethod
+    def from_raw(cls, market) -> "Option":
+        outcome_prices = parse_string_list(lookup(market, "outcomePrices", default="[0]"))
+        outcome_options = parse_string_list(lookup(market, "outcomes", default="[0]"))
+        title = lookup(market, "groupItemTitle", default="")
+
+        if title:
+            name = str(title) + " (" + outcome_options[0] + " is outcome)"
+        else:
+            name = outcome_options[0]
+        return cls(
+            name,
+            to_float(outcome_prices[0]) * 100,  # Convert to percentage
+            # A missing price is int 0, as it always was in data.json
+            to_float(lookup(market, "lastTradePrice")),
+            lookup(market, "oneDayPriceChange", default=0),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "probability": self.probability,
+            "last_trade_price": self.last_trade_price,
+            "oneDayPriceChange": self.one_day_price_change,
+        }
+
+
+class Event:
+    """
+    Compact parsed market. Tags are kept as (id, label) tuples.
+
+    to_dict() produces exactly the dict parse_event returns and data.json stores.
+    Until then, get() reads the scalar fields by their dict keys, so code written
+    against market dicts (selection, dedupe) works on records too.
+    """
+
+    __slots__ = ("interest_score", "title", "ticker", "description", "end_date", "volume",
+                 "featured", "volume24hr", "comment_count", "options", "tags")
+
+    # dict key -> attribute, for the fields that are plain values in both forms
+    _scalar_fields = {
+        "interest_score": "interest_score",
+        "title": "title",
+        "ticker": "ticker",
+        "description": "description",
+        "end_date": "end_date",
+        "volume": "volume",
+        "featured": "featured",
+        "volume24hr": "volume24hr",
+        "commentCount": "comment_count",
+    }
+
+    def __init__(self, title, ticker, description, end_date, volume, featured, volume24hr,
+                 comment_count, options, tags, interest_score=0):
+        self.interest_score = interest_score
+        self.title = title
+        self.ticker = ticker
+        self.description = description
+        self.end_date = end_date
+        self.volume = volume
+        self.featured = featured
+        self.volume24hr = volume24hr
+        self.comment_count = comment_count
+        self.options = options
+        self.tags = tags
+
+    @classmethod
+    def from_raw(cls, event) -> "Event":
+        tags = [(lookup(tag, "id"), lookup(tag, "label")) for tag in lookup(event, "tags", default=[])]
+        options = [Option.from_raw(market) for market in lookup(event, "markets", default=[])]
+        # Sort options by probability in descending order
+        options.sort(key=_probability_key, reverse=True)
+        return cls(
+            title=lookup(event, "title"),
+            ticker=lookup(event, "ticker"),
+            description=lookup(event, "description"),
+            end_date=lookup(event, "endDate"),
+            volume=to_float(lookup(event, "volume", default=0)),
+            featured=lookup(event, "featured"),
+            volume24hr=to_float(lookup(event, "volume24hr", default=0)),
+            comment_count=to_float(lookup(event, "commentCount")),
+            options=options,
+            tags=tags,
+        )
+
+    def get(self, key, default=None):
+        attribute = self._scalar_fields.get(key)
+        return default if attribute is None else getattr(self, attribute)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "interest_score": self.interest_score,
+            "title": self.title,
+            "ticker": self.ticker,
+            "description": self.description,
+            "end_date": self.end_date,
+            "volume": self.volume,
+            "featured": self.featured,
+            "volume24hr": self.volume24hr,
+            "commentCount": self.comment_count,
+            "options": [option.to_dict() for option in self.options],
+            "tags": [{"id": tag_id, "label": label} for tag_id, label in self.tags],
+        }
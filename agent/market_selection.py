@@ -0,0 +1,200 @@
+import heapq
+from itertools import chain
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+
+def interest_key(market: Dict[str, Any]) -> float:
+    return market.get('interest_score', 0)
+
+
+class TopK:
+    """
+    The k best items seen so far, in the order sorted(items, key=key, reverse=True)[:k] gives.
+
+    A bounded min-heap, so memory is O(k) however many items are pushed. Ties
+    are broken by arrival order, earliest first, because Python's sort is
+    stable under reverse=True.
+    """
+
+    def __init__(self, k: int, key: Callable[[Any], float] = interest_key):
+        self.k = k
+        self.key = key
+        self.seen = 0
+        # (score, -arrival, item): the heap root is the lowest score, latest arrival among ties.
+        # Arrivals are unique, so items themselves are never compared.
+        self._heap = []
+
+    def push(self, item):
+        arrival = self.seen
+        self.seen += 1
+        self.offer((self.key(item), -arrival, item))
+
+    def offer(self, entry: Tuple[float, int, Any]):
+        """Push a (score, -arrival, item) entry whose arrival the caller has already assigned."""
+        if self.k <= 0:
+            return
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, items: Iterable[Any]):
+        for item in items:
+            self.push(item)
+
+    def entries(self) -> List[Tuple[float, int, Any]]:
+        return self._heap
+
+    def results(self) -> List[Any]:
+        """Best first, ties in arrival order."""
+        return [entry[2] for entry in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class TickerDeduplicator:
+    """
+    Ticker index that drops repeat copies of an event as results stream in.
+
+    Neighbouring date windows share a boundary, so the same event can come back
+    twice. A later copy replaces the kept one when its volume24hr is at least as
+    fresh (not lower); otherwise it is dropped. dropped counts every duplicate seen.
+    Memory is one float per distinct ticker.
+    """
+
+    def __init__(self):
+        self._volume24hr = {}
+        self.dropped = 0
+
+    def admit(self, market: Dict[str, Any]) -> bool:
+        """Record market and return True if it should replace or join the results."""
+        ticker = market.get('ticker')
+        if ticker is None or ticker == "N/A":
+            return True
+        volume24hr = market.get('volume24hr', 0)
+        previous = self._volume24hr.get(ticker)
+        if previous is None:
+            self._volume24hr[ticker] = volume24hr
+            return True
+        self.dropped += 1
+        if volume24hr >= previous:
+            self._volume24hr[ticker] = volume24hr
+            return True
+        return False
+
+    def filter(self, markets: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield first copies and fresher replacements; downstream must replace by ticker."""
+        for market in markets:
+            if self.admit(market):
+                yield market
+
+
+def dedupe_markets(markets: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Collapse duplicate tickers in a market list, keeping each ticker at its first position.
+
+    :return: (deduplicated markets, number of duplicates dropped)
+    """
+    deduplicator = TickerDeduplicator()
+    result = []
+    positions = {}
+    for market in markets:
+        if not deduplicator.admit(market):
+            continue
+        ticker = market.get('ticker')
+        if ticker in positions:
+            result[positions[ticker]] = market
+        else:
+            if ticker is not None and ticker != "N/A":
+                positions[ticker] = len(result)
+            result.append(market)
+    return result, deduplicator.dropped
+
+
+def market_ticker(market: Dict[str, Any]) -> Hashable:
+    ticker = market.get('ticker')
+    # Markets without a ticker can't be duplicates of each other
+    return id(market) if ticker is None or ticker == "N/A" else ticker
+
+
+class WindowedTopMarkets:
+    """
+    The k most interesting markets of a stream of date windows, deduplicated by ticker.
+
+    Duplicates only come from neighbouring windows sharing a boundary, so a
+    market can only be replaced while its window or the next one is streaming.
+    Markets of those two windows are held by ticker: the latest admitted copy
+    (same volume24hr rule as TickerDeduplicator) at the first copy's arrival
+    position, as dedupe_markets keeps them. Once a window is two back, its
+    markets can no longer change and go into a TopK heap capped at k. Memory is
+    O(k) plus the tickers of two windows.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.final = TopK(k)
+        self.dropped = 0
+        # ticker -> (score, -first arrival, latest copy)
+        self._current = {}
+        self._previous = {}
+        self._arrivals = 0
+
+    def add_window(self, markets: Iterable[Dict[str, Any]]):
+        """Stream the next window's markets in."""
+        offer = self.final.offer
+        for entry in self._previous.values():
+            offer(entry)
+        previous, current = self._current, {}
+        self._previous, self._current = previous, current
+
+        arrival = self._arrivals
+        for market in markets:
+            ticker = market.get('ticker')
+            if ticker is None or ticker == "N/A":
+                # Can't be a duplicate of anything, so it's final right away
+                offer((market.get('interest_score', 0), -arrival, market))
+                arrival += 1
+                continue
+            held = current.get(ticker)
+            if held is None:
+                held = previous.get(ticker)
+                if held is None:
+                    current[ticker] = (market.get('interest_score', 0), -arrival, market)
+                    arrival += 1
+                    continue
+                del previous[ticker]
+            self.dropped += 1
+            if market.get('volume24hr', 0) >= held[2].get('volume24hr', 0):
+                held = (market.get('interest_score', 0), held[1], market)
+            current[ticker] = held
+        self._arrivals = arrival
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Best first, ties in first-arrival order."""
+        entries = heapq.nlargest(self.k, chain(self.final.entries(), self._previous.values(), self._current.values()))
+        return [entry[2] for entry in entries]
+
+
+def select_top_markets(windows: Iterable[Iterable[Dict[str, Any]]], k: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Dedupe a stream of date windows by ticker and keep the k most interesting markets.
+
+    Returns sorted(dedupe_markets(all markets)[0], key=interest_key, reverse=True)[:k]
+    as long as a ticker only repeats within a window or in the next one, which is
+    how overlapping day windows produce duplicates.
+
+    :param windows: Markets of each window in turn, e.g. one iterator per day window
+    :return: (top markets, number of duplicates dropped)
+    """
+    selector = WindowedTopMarkets(k)
+    for window in windows:
+        selector.add_window(window)
+    return selector.results(), selector.dropped
+
+
+def top_k(items: Iterable[Any], k: int, key: Callable[[Any], float] = interest_key) -> List[Any]:
+    """Drop-in for sorted(items, key=key, reverse=True)[:k] that consumes a stream in O(k) memory."""
+    selector = TopK(k, key)
+    selector.extend(items)
+    return selector.results()
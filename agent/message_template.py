@@ -0,0 +1,67 @@
+import uuid
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.policy import compat32
+from string import Template
+from typing import Dict, Optional
+
+# What send_message used: the messages' own compat32 policy, with the CRLF line endings SMTP needs
+WIRE_POLICY = compat32.clone(linesep="\r\n")
+
+
+class MessageTemplate:
+    """
+    A newsletter MIME message serialized to bytes once, re-stamped per recipient.
+
+    The message is built with a placeholder To header and split into the
+    headers before and after To, the HTML part, and the rest (the base64 logo).
+    Rendering for a recipient only joins those byte strings around the new To
+    address. If the recipient has tokens (e.g. an unsubscribe link written as
+    ${unsubscribe_url} in the HTML), only the HTML part is substituted and
+    re-encoded.
+    """
+
+    def __init__(self, subject: str, sender: str, html: str, logo_data: Optional[bytes] = None):
+        self.html_template = Template(html)
+        placeholder = f"{uuid.uuid4().hex}@recipient.invalid"
+
+        msg = MIMEMultipart('related')
+        msg_alternative = MIMEMultipart('alternative')
+        msg.attach(msg_alternative)
+        msg['Subject'] = subject
+        msg['From'] = sender
+        msg['To'] = placeholder
+
+        html_part = MIMEText(html, 'html')
+        msg_alternative.attach(html_part)
+
+        if logo_data is not None:
+            img = MIMEImage(logo_data)
+            img.add_header('Content-ID', '<logo>')
+            img.add_header('Content-Disposition', 'inline; filename="PNDlogo.jpeg"')
+            img.add_header('Content-Type', 'image/jpeg; name="PNDlogo.jpeg"')
+            msg.attach(img)
+
+        raw = msg.as_bytes(policy=WIRE_POLICY)
+        self._html_part = html_part.as_bytes(policy=WIRE_POLICY)
+        html_start = raw.find(self._html_part)
+        to_header = f"To: {placeholder}\r\n".encode('ascii')
+        to_start = raw.find(to_header)
+        if html_start < 0 or to_start < 0 or to_start > html_start:
+            raise ValueError("Could not locate the To header and HTML part in the serialized message")
+
+        self._before_to = raw[:to_start]
+        self._after_to = raw[to_start + len(to_header):html_start]
+        self._after_html = raw[html_start + len(self._html_part):]
+
+    def render(self, to: str, tokens: Optional[Dict[str, str]] = None) -> bytes:
+        """Message bytes for one recipient, ready for smtplib's sendmail"""
+        if '\r' in to or '\n' in to:
+            raise ValueError(f"Invalid recipient address: {to!r}")
+        html_part = self._html_part
+        if tokens:
+            html_part = MIMEText(self.html_template.safe_substitute(tokens), 'html').as_bytes(policy=WIRE_POLICY)
+        return b"".join((
+            self._before_to, b"To: ", to.encode('ascii'), b"\r\n", self._after_to, html_part, self._after_html
+        ))
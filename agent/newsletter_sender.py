@@ -4,16 +4,27 @@ from pydantic import BaseModel
 import json
 from pathlib import Path
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.image import MIMEImage
+from email.utils import parseaddr
 from string import Template
-import time
+from collections import OrderedDict
+import hashlib
+import threading
 import re
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from email_collection_app.backend.database import get_db_connection
+from agent.smtp_pool import SMTPSessionPool, deliver
+from agent.message_template import MessageTemplate
+from agent import send_jobs
+
+PERCENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?\s*%)')
+
+NEWSLETTER_SUBJECT = "📈 Today's Prediction Market Powered News"
+
+# Rendered article fragments kept for previews, resends and /api/send-latest
+FRAGMENT_CACHE_SIZE = 1024
+
 class Article(BaseModel):
     id: int
     headline: str
@@ -31,6 +42,8 @@ class NewsletterSender:
         self.load_template()
         self.load_logo()
         self.db_conn = None
+        self._fragment_cache = OrderedDict()
+        self._fragment_lock = threading.Lock()
 
     def save_newsletter_to_db(self, articles: List[Article], 
                        groups: Dict[str, List[int]] = None):
@@ -163,13 +176,30 @@ class NewsletterSender:
 
     def _highlight_numbers(self, text: str) -> str:
         """Highlight only numbers that are followed by a percentage sign with a brighter blue"""
-        pattern = r'(\d+(?:\.\d+)?\s*%)'
-        return re.sub(pattern, r'<span style="color: #60A5FA;">\1</span>', text)
+        return PERCENT_PATTERN.sub(r'<span style="color: #60A5FA;">\1</span>', text)
+
+    def _article_fragment(self, article: Article) -> str:
+        """Rendered HTML for one article, cached by (article id, content hash)"""
+        content_hash = hashlib.sha1(
+            "\x1f".join((article.ticker, article.headline, article.subheader, article.blurb)).encode('utf-8')
+        ).hexdigest()
+        key = (article.id, content_hash)
+        with self._fragment_lock:
+            fragment = self._fragment_cache.get(key)
+            if fragment is not None:
+                self._fragment_cache.move_to_end(key)
+                return fragment
+        fragment = self._format_single_article(article)
+        with self._fragment_lock:
+            self._fragment_cache[key] = fragment
+            if len(self._fragment_cache) > FRAGMENT_CACHE_SIZE:
+                self._fragment_cache.popitem(last=False)
+        return fragment
 
     def format_articles(self, articles: List[Article], groups: Dict[str, List[int]] = None) -> str:
         """Format articles into HTML with optional grouping"""
         # Start with logo section
-        articles_html = f"""
+        parts = [f"""
         <tr>
             <td style="padding: 30px 30px 20px 30px; background-color: #FFFFFF; text-align: center;">
                 <div style="max-width: 600px; margin: 0 auto;">
@@ -194,7 +224,7 @@ class NewsletterSender:
                 </div>
             </td>
         </tr>
-    """
+    """]
         
         # Rest of the format_articles method remains the same
         used_article_ids = set()
@@ -207,7 +237,7 @@ class NewsletterSender:
                 high_scoring_articles = [article for article in group_articles if article.score > 5]
 
                 if high_scoring_articles:
-                    articles_html += f"""
+                    parts.append(f"""
                 <tr>
                     <td style="padding: 20px 30px 10px 30px; background-color: #FFFFFF;">
                         <div style="padding: 15px; border-radius: 8px; border: 1px solid #2E87EC; background-color: #EEEEEE; text-align: center;">
@@ -219,10 +249,10 @@ class NewsletterSender:
                         </div>
                     </td>
                 </tr>
-            """
+            """)
 
                     for article in sorted(high_scoring_articles, key=lambda x: x.score, reverse=True):
-                        articles_html += self._format_single_article(article)
+                        parts.append(self._article_fragment(article))
 
                     used_article_ids.update(article.id for article in high_scoring_articles)
         ungrouped_articles = [article for article in articles 
@@ -230,7 +260,7 @@ class NewsletterSender:
         
         if ungrouped_articles:
             if groups and groups.keys():
-                articles_html += """
+                parts.append("""
                     <tr>
                         <td style="padding: 20px 30px 10px 30px; background-color: #FFFFFF;">
                             <div style="padding: 15px; border-radius: 8px; border: 1px solid #2E87EC; background-color: #EEEEEE; text-align: center;">
@@ -242,12 +272,12 @@ class NewsletterSender:
                             </div>
                         </td>
                     </tr>
-                """
+                """)
             
             for article in sorted(ungrouped_articles, key=lambda x: x.score, reverse=True):
-                articles_html += self._format_single_article(article)
+                parts.append(self._article_fragment(article))
 
-        return articles_html
+        return "".join(parts)
 
     def _format_single_article(self, article: Article) -> str:
         """Format a single article into HTML with dark mode styling"""
@@ -280,74 +310,77 @@ class NewsletterSender:
             </tr>
         """
 
+    def render_newsletter(self, articles: List[Article], groups: Dict[str, List[int]] = None) -> str:
+        """Full newsletter HTML; per-recipient $placeholders are left in place"""
+        formatted_date = datetime.now().strftime("%B %d, %Y")
+        articles_html = self.format_articles(articles, groups)
+        return self.template.safe_substitute(
+            date=formatted_date,
+            articles=articles_html
+        )
+
     def send_newsletter(self, smtp_config: dict, emails: List[str], articles: List[Article], 
-                       groups: Dict[str, List[int]] = None):
-        """Send newsletter to all recipients"""
+                       groups: Dict[str, List[int]] = None, workers: int = 4, rate: float = None,
+                       recipient_tokens: Dict[str, Dict[str, str]] = None, job_id: int = None):
+        """
+        Send newsletter to all recipients through the send outbox
+
+        The send is recorded as a job first, so if this process dies part way
+        through, send_newsletter(..., job_id=<id>) or `python agent/send_jobs.py <id>`
+        finishes it without mailing the recipients already marked sent.
+
+        :param workers: Number of logged-in SMTP sessions sending concurrently
+        :param rate: Max messages per second across all sessions, defaults to
+            smtp_config['max_per_second'] or 5
+        :param recipient_tokens: Per-email values for $name placeholders in the HTML,
+            e.g. {"a@b.com": {"unsubscribe_url": "..."}}
+        :param job_id: Resume this job instead of creating a new one
+        """
         try:
-            print(len(emails))
-            server = smtplib.SMTP(smtp_config['host'], smtp_config['port'])
-            server.starttls()
-            server.login(smtp_config['auth']['user'], smtp_config['auth']['pass'])
-
-            formatted_date = datetime.now().strftime("%B %d, %Y")
-            articles_html = self.format_articles(articles, groups)
-            html_content = self.template.substitute(
-                date=formatted_date,
-                articles=articles_html
-            )
-
-            subject = "📈 Today's Prediction Market Powered News"
-
-            results = {'successful': [], 'failed': []}
-            batch_size = 50
-            print(len(emails))
-            for i in range(0, len(emails), batch_size):
-                batch = emails[i:i + batch_size]
-                # The error is likely happening in this print statement if len(emails) is None, since None > int is not supported.
-                # TypeError: '>' not supported between instances of 'NoneType' and 'int'
-                print(f"Sending batch {(i//batch_size) + 1}/{(len(emails)-1)//batch_size + 1}")
-
-                for email in batch:
-                    try:
-                        msg = MIMEMultipart('related')
-                        msg_alternative = MIMEMultipart('alternative')
-                        msg.attach(msg_alternative)
-                        
-                        msg['Subject'] = "📈 Today's Prediction Market Powered News"
-                        msg['From'] = smtp_config['from']
-                        msg['To'] = email
-                        
-                        # Attach HTML content
-                        msg_alternative.attach(MIMEText(html_content, 'html'))
-                        
-                        # Attach logo image
-                        img = MIMEImage(self.logo_data)
-                        img.add_header('Content-ID', '<logo>')
-                        img.add_header('Content-Disposition', 'inline; filename="PNDlogo.jpeg"')  # Add filename
-                        img.add_header('Content-Type', 'image/jpeg; name="PNDlogo.jpeg"')  # Add content type w
-                        msg.attach(img)
-                        server.send_message(msg)
-                        results['successful'].append(email)
-                        print(f"Successfully sent to: {email}")
-                        
-                    except Exception as e:
-                        results['failed'].append({
-                            'email': email,
-                            'error': str(e)
-                        })
-                        print(f"Failed to send to {email}: {str(e)}")
-                    
-                    time.sleep(0.2)
-                
-                time.sleep(1)
+            if job_id is None:
+                job_id = self.create_send_job(emails, articles, groups, recipient_tokens)
+            print(f"Sending job {job_id}")
+            return self.run_send_job(smtp_config, job_id, workers=workers, rate=rate)
+        except Exception as e:
+            print(f"Error sending newsletter: {str(e)}")
+            return None
+
+    def _send_direct(self, smtp_config: dict, emails: List[str], articles: List[Article],
+                     groups: Dict[str, List[int]] = None, workers: int = 4, rate: float = None):
+        """Send without recording a job, for one-off sends such as a new subscriber's welcome copy"""
+        pool = SMTPSessionPool(smtp_config, size=workers)
+        try:
+            pool.open()
+
+            html_content = self.render_newsletter(articles, groups)
+
+            # Serialized once; each recipient only gets a new To header
+            message = MessageTemplate(NEWSLETTER_SUBJECT, smtp_config['from'], html_content, self.logo_data)
+            envelope_from = parseaddr(smtp_config['from'])[1]
+
+            def send_one(server, email):
+                server.sendmail(envelope_from, [email], message.render(email))
+
+            if rate is None:
+                rate = smtp_config.get('max_per_second', 5)
+            return deliver(pool, emails, send_one, workers=workers, rate=rate)
 
-            server.quit()
-            return results
-            
         except Exception as e:
             print(f"Error sending newsletter: {str(e)}")
             return None
-        
+        finally:
+            pool.close()
+
+    def create_send_job(self, emails: List[str], articles: List[Article],
+                        groups: Dict[str, List[int]] = None,
+                        recipient_tokens: Dict[str, Dict[str, str]] = None) -> int:
+        """Record a durable, resumable send of this newsletter; deliver it with run_send_job"""
+        return send_jobs.create_job(self.render_newsletter(articles, groups), emails, NEWSLETTER_SUBJECT,
+                                    recipient_tokens)
+
+    def run_send_job(self, smtp_config: dict, job_id: int, workers: int = 4, rate: float = None):
+        """Send (or resume) a job created with create_send_job; several processes may run the same job"""
+        return send_jobs.run_job(job_id, smtp_config, logo_data=self.logo_data, workers=workers, rate=rate)
 
     def send_latest_to_subscriber(self, smtp_config: dict, email: str):
         """Send the most recent newsletter to a new subscriber"""
@@ -358,7 +391,8 @@ class NewsletterSender:
             
         try:
             articles, groups = latest
-            self.send_newsletter(smtp_config, [email], articles, groups)
+            results = self._send_direct(smtp_config, [email], articles, groups, workers=1)
+            return bool(results and results['successful'])
             
         except Exception as e:
             print(f"Error sending latest newsletter to {email}: {str(e)}")
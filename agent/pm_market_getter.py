@@ -1,11 +1,15 @@
 import requests
 import json
-from urllib.parse import urlencode
-import ast
 import datetime
-from typing import List, Dict, Any
-
-BASE_URL = "https://gamma-api.polymarket.com/events"
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.polymarket_client import get_default_client
+from agent.market_records import Event
+from agent.scoring import get_default_rules, score_events
+from agent.market_selection import dedupe_markets, select_top_markets
 
 
 def safe_get(data, *keys, default="N/A"):
@@ -35,135 +39,262 @@ def safe_float(value, default=0):
     except (ValueError, TypeError):
         return default
 
-def get_markets(params=None):
-    try:
-        market_info = []
-        # Method 1: Adding parameters to the URL
-        if params:
-            query_string = urlencode(params)
-            url = f"{BASE_URL}?{query_string}"
-        else:
-            url = BASE_URL
+def fetch_events(params=None, client=None):
+    """Request one page of raw events from the Gamma API. Raises on HTTP errors."""
+    client = client or get_default_client()
+    return client.get_json(params)
 
-        # Method 2: Passing parameters to requests.get()
-        # Uncomment the next line and comment out the 'response = requests.get(url)'
-        # line if you prefer this method
-        # response = requests.get(BASE_URL, params=params)
-        
-        response = requests.get(url)
-        
-        response.raise_for_status()
-        events = response.json()
-        for event in events:
-            high_level_info = {
-            "title": safe_get(event, "title"),
-            "ticker": safe_get(event, "ticker"),
-            "description": safe_get(event, "description"),
-            "end_date": safe_get(event, "endDate"),
-            "volume": safe_float(safe_get(event, "volume", default=0)),
-            "featured": safe_get(event, "featured"),
-            "volume24hr" : safe_float(safe_get(event, "volume24hr", default=0)),
-            "commentCount" : safe_float(safe_get(event, "commentCount", 0))
-        }
-            tags = [{"id": safe_get(tag, "id"), "label": safe_get(tag, "label")} for tag in  safe_get(event, "tags", default=[])]
-            markets = safe_get(event, "markets", default=[])
-        
-            options = []
-            for market in markets:
-                outcome_prices = ast.literal_eval(safe_get(market, "outcomePrices", default="[0]"))
-                outcome_options = ast.literal_eval(safe_get(market, "outcomes", default="[0]"))
-                title = safe_get(market, "groupItemTitle", default="")
-
-                if title:
-                    name = str(title) + " (" + outcome_options[0] + " is outcome)"
-                else:
-                    name = outcome_options[0]
-                option = {
-                    "name": name,
-                    "probability": safe_float(outcome_prices[0]) * 100,  # Convert to percentage
-                    "last_trade_price": safe_float(safe_get(market, "lastTradePrice", 0)),
-                    "oneDayPriceChange": safe_get(market, "oneDayPriceChange", default=0)
-                }
-                options.append(option)
 
-        
-    # Sort options by probability in descending order
-            options.sort(key=lambda x: (x["probability"] != "N/A", x["probability"]), reverse=True)
-            if options:
-                avg_price_change = max(abs(option.get('oneDayPriceChange', 0)) for option in options)/len(options)
-            else:
-                avg_price_change = 0
-            if high_level_info["volume"] >0:
-                    
-                base_score = (avg_price_change * high_level_info["volume24hr"] +
-                            (high_level_info["commentCount"]*100 * (high_level_info["volume24hr"] / high_level_info["volume"])))
-            else:
-                base_score = 0
-            # Apply multiplier if feature
-            interest_score = base_score * 2 if high_level_info["featured"] else base_score
-            if any(tag["id"] == 198 for tag in tags):
-                interest_score*=100
-            if options:
-                probabilities = [option["probability"] for option in options]
-                has_100 = any(abs(p - 100) < 0.001 for p in probabilities)
-    
-                # Check if all probabilities are 0
-                all_zero = all(abs(p) < 0.001 for p in probabilities)
-                if  (has_100 or all_zero):
-                    interest_score = 0
-            output = {
-            "interest_score" : interest_score,
-            "title": high_level_info["title"],
-            "ticker": high_level_info["ticker"],
-            "description": high_level_info["description"],
-            "end_date": high_level_info["end_date"],
-            "volume": high_level_info["volume"],
-            "featured": high_level_info["featured"],
-            "volume24hr" : high_level_info["volume24hr"],
-            "commentCount" : high_level_info["commentCount"],
-            "options": options,
-             "tags": tags
-        }
-
-            market_info.append(output)
-
-
-        return market_info
+def compute_interest_score(market, rules=None):
+    """
+    Score a single parsed market. score_markets in agent.scoring is the batch equivalent.
+
+    :param rules: CompiledRules from agent.scoring; defaults to scoring_rules.json
+    """
+    rules = rules or get_default_rules()
+    options = market["options"]
+    if options:
+        avg_price_change = max(abs(option.get('oneDayPriceChange', 0)) for option in options)/len(options)
+    else:
+        avg_price_change = 0
+    passes_floor = rules.min_volume24hr is None or market["volume24hr"] >= rules.min_volume24hr
+    if not (market["volume"] > rules.min_volume and passes_floor):
+        return 0
+    base_score = (avg_price_change * market["volume24hr"] +
+                (market["commentCount"]*100 * (market["volume24hr"] / market["volume"])))
+    # Apply multiplier if feature
+    interest_score = base_score * rules.featured_multiplier if market["featured"] else base_score
+    # One table lookup per tag (parsed tag ids are floats, or strings when not numeric).
+    # Each boosted tag applies once, in the same order as the batch path.
+    tag_weights = rules.tag_weights
+    boosts = [tag["id"] for tag in market["tags"] if type(tag["id"]) is float and tag["id"] in tag_weights]
+    if boosts:
+        for tag_id in sorted(set(boosts)):
+            interest_score *= tag_weights[tag_id]
+    if options and rules.zero_resolved:
+        probabilities = [option["probability"] for option in options]
+        has_100 = any(abs(p - 100) < 0.001 for p in probabilities)
+
+        # Check if all probabilities are 0
+        all_zero = all(abs(p) < 0.001 for p in probabilities)
+        if  (has_100 or all_zero):
+            interest_score = 0
+    return interest_score
+
+
+def parse_event(event, score: bool = True):
+    """
+    Turn a raw Gamma event into the market dict we score and store.
+
+    Pass score=False when the caller scores a whole batch with score_markets instead.
+    Batch callers can skip the dict entirely: keep Event records, score them with
+    score_events and call to_dict() only when serializing.
+    """
+    output = Event.from_raw(event).to_dict()
+    if score:
+        output["interest_score"] = compute_interest_score(output)
+
+    return output
+
+
+def get_market_records(params=None) -> Optional[List[Event]]:
+    """One page of scored Event records, or None if the request failed."""
+    try:
+        events = fetch_events(params)
     except requests.exceptions.RequestException as e:
         print(f"An error occurred: {e}")
         return None
+    records = [Event.from_raw(event) for event in events]
+    score_events(records)
+    return records
+
+
+def get_markets(params=None):
+    records = get_market_records(params)
+    if records is None:
+        return None
+    return [record.to_dict() for record in records]
 
 
-def get_markets_for_date_range(days_in_past: int, limit: int = 100, offset: int = 0) -> List[Dict[Any, Any]]:
+def iter_event_pages(params=None, page_size: int = 100) -> Iterator[List[Dict[str, Any]]]:
     """
-    Retrieve markets for a specified number of days in the past, making multiple API calls if necessary.
+    Page through the /events endpoint, advancing offset until the query runs dry.
 
-    :param days_in_past: Number of days in the past to retrieve markets for
-    :param limit: Number of markets to retrieve per API call
-    :param offset: Initial offset for the API call
-    :return: List of all markets retrieved
+    :param params: Query params for the window; any 'limit' is replaced by page_size
+    :param page_size: Number of events to request per page
+    :return: Iterator over pages of raw events, yielded as each page arrives
     """
-    all_markets = []
-    end_date = datetime.datetime.now()
+    page_params = dict(params or {})
+    offset = int(page_params.get('offset', 0))
+    while True:
+        page_params['limit'] = page_size
+        page_params['offset'] = offset
+        events = fetch_events(page_params)
+        if not events:
+            return
+        yield events
+        if len(events) < page_size:
+            return
+        offset += len(events)
+
+
+def iter_raw_events(params=None, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+    """Like iter_event_pages, but yields the raw events one at a time."""
+    for events in iter_event_pages(params, page_size):
+        yield from events
+
+
+def iter_market_records(params=None, page_size: int = 100) -> Iterator[Event]:
+    """Yield scored Event records for every page of a query. A failed page ends the query."""
+    try:
+        for events in iter_event_pages(params, page_size):
+            records = [Event.from_raw(event) for event in events]
+            score_events(records)
+            yield from records
+    except requests.exceptions.RequestException as e:
+        print(f"An error occurred: {e}")
+
+
+def iter_markets(params=None, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+    """Yield parsed markets for every page of a query. A failed page ends the query."""
+    for record in iter_market_records(params, page_size):
+        yield record.to_dict()
+
+
+def _date_range_params(days_in_past: int, limit: int, offset: int,
+                       end_date: Optional[datetime.datetime] = None,
+                       open_ended: bool = False) -> List[Dict[str, Any]]:
+    """
+    Build the query params for each one-day window, newest window first.
+
+    :param open_ended: Leave start_date_max off the newest window, so events that
+        start after end_date are included too
+    """
+    windows = []
+    end_date = end_date or datetime.datetime.now()
     start_date = end_date - datetime.timedelta(days=days_in_past)
 
     current_date = end_date
     while current_date > start_date:
-        params = {
+        windows.append({
             'limit': limit,
             'offset': offset,
             'active': 'true',
             'start_date_max': current_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
             'start_date_min': (current_date - datetime.timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
-        }
-
-        markets = get_markets(params)
-        if markets is not None:
-            all_markets.extend(markets)
+        })
         current_date -= datetime.timedelta(days=1)
+    if open_ended and windows:
+        del windows[0]['start_date_max']
+    return windows
+
 
+def _get_window_records(params, paginate: bool) -> Optional[List[Event]]:
+    if paginate:
+        return list(iter_market_records(params, page_size=params['limit']))
+    return get_market_records(params)
+
+
+def _fetch_windows(fetch_window, windows, max_workers: int) -> list:
+    """Run fetch_window over every window, up to max_workers at once, results in window order."""
+    if max_workers > 1 and len(windows) > 1:
+        # executor.map yields results in submission order, so the output matches the serial walk
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+            return list(executor.map(fetch_window, windows))
+    return [fetch_window(params) for params in windows]
+
+
+def get_markets_for_date_range(days_in_past: int, limit: int = 100, offset: int = 0,
+                               max_workers: int = 1, paginate: bool = False,
+                               end_date: Optional[datetime.datetime] = None) -> List[Dict[Any, Any]]:
+    """
+    Retrieve markets for a specified number of days in the past, making multiple API calls if necessary.
+
+    :param days_in_past: Number of days in the past to retrieve markets for
+    :param limit: Number of markets to retrieve per API call
+    :param offset: Initial offset for the API call
+    :param max_workers: Number of day windows to request concurrently (1 keeps the serial path)
+    :param paginate: Keep advancing offset within each window instead of stopping at the first page
+    :param end_date: End of the newest window (defaults to now); pin it to reuse cached responses
+    :return: List of all markets retrieved, in the same order as the serial path
+    """
+    windows = _date_range_params(days_in_past, limit, offset, end_date)
+    results = _fetch_windows(lambda params: _get_window_records(params, paginate), windows, max_workers)
+
+    all_markets = []
+    for records in results:
+        if records is not None:
+            all_markets.extend(records)
+
+    # Neighbouring windows share a boundary, so the same event can come back twice
+    all_markets, dropped = dedupe_markets(all_markets)
+    if dropped:
+        print(f"Dropped {dropped} duplicate markets")
+    # Serialize in place, so each record is freed as soon as its dict exists
+    for i, record in enumerate(all_markets):
+        all_markets[i] = record.to_dict()
     return all_markets
 
+
+def get_raw_events_for_date_range(days_in_past: int, limit: int = 100, max_workers: int = 1,
+                                  end_date: Optional[datetime.datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Every raw event in the date range, each one-day window fully paginated.
+
+    Windows are requested concurrently like get_markets_for_date_range(paginate=True),
+    but the events are returned unparsed, and a failed page raises instead of
+    cutting its window short, so callers never mistake a partial result for a full one.
+    The newest window has no upper bound, so nothing that started after end_date
+    is missed when end_date is pinned (e.g. to the hour, for caching).
+
+    :param max_workers: Number of day windows to request concurrently
+    :return: Raw events, newest window first; neighbouring windows may repeat an event
+    """
+    windows = _date_range_params(days_in_past, limit, 0, end_date, open_ended=True)
+    results = _fetch_windows(lambda params: list(iter_raw_events(params, page_size=limit)), windows, max_workers)
+    return [event for events in results for event in events]
+
+
+def iter_window_markets(days_in_past: int, limit: int = 100, offset: int = 0,
+                        end_date: Optional[datetime.datetime] = None) -> Iterator[Iterator[Event]]:
+    """One iterator of scored Event records per one-day window, newest first."""
+    for params in _date_range_params(days_in_past, limit, offset, end_date):
+        yield iter_market_records(params, page_size=limit)
+
+
+def iter_markets_for_date_range(days_in_past: int, limit: int = 100, offset: int = 0,
+                                end_date: Optional[datetime.datetime] = None) -> Iterator[Dict[Any, Any]]:
+    """
+    Stream every market in the date range, fully paginating each one-day window.
+
+    Markets are yielded as soon as their page is parsed, so callers can start scoring
+    before the download finishes and never hold the whole range in memory.
+
+    :param days_in_past: Number of days in the past to retrieve markets for
+    :param limit: Page size for each API call
+    :param offset: Initial offset within each window
+    :param end_date: End of the newest window (defaults to now)
+    """
+    for params in _date_range_params(days_in_past, limit, offset, end_date):
+        yield from iter_markets(params, page_size=limit)
+
+
+def get_top_markets_for_date_range(days_in_past: int, k: int = 20, limit: int = 100,
+                                   end_date: Optional[datetime.datetime] = None) -> List[Dict[Any, Any]]:
+    """
+    Stream the whole date range and keep only the k most interesting markets.
+
+    Same result as sorting the deduplicated markets from
+    get_markets_for_date_range(paginate=True) and slicing, but memory is O(k)
+    plus the markets of two day windows, never every page. Those are held as
+    Event records; only the k winners are turned into dicts.
+    """
+    records, dropped = select_top_markets(iter_window_markets(days_in_past, limit=limit, end_date=end_date), k)
+    if dropped:
+        print(f"Dropped {dropped} duplicate markets")
+    return [record.to_dict() for record in records]
+
+
 def main():
     # Example parameters
     # params = {
@@ -174,13 +305,16 @@ def main():
         
     # }
 
-    markets = get_markets_for_date_range(days_in_past=1, limit=1)
-    sorted_markets_by_interest = sorted(markets, key=lambda x: x.get('interest_score', 0), reverse=True)
-    if sorted_markets_by_interest:
-        json_string = json.dumps(sorted_markets_by_interest[:20], indent=2)
+    # Only events updated since the last run are downloaded; scoring reads from the local store
+    from agent.event_store import EventStore, sync_events
+    store = EventStore()
+    sync_events(store, days_in_past=1, page_size=100)
+    top_markets = store.top_markets(20, days_in_past=1)
+    if top_markets:
+        json_string = json.dumps(top_markets, indent=2)
         with open("data.json", "w") as file:
             file.write(json_string)
-            print("number of markets received: ", len(sorted_markets_by_interest))
+            print("number of markets stored: ", store.count())
         with open("data.json", "r") as file:
             file_contents = file.read()
             print(file_contents)
@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = "https://gamma-api.polymarket.com/events"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class PolymarketClient:
+    """
+    Reusable HTTP client for the Gamma API.
+
+    Keeps one pooled requests.Session so every day-window reuses the same
+    keep-alive connections, retries 429/5xx with bounded exponential backoff,
+    and remembers ETags so unchanged pages come back as a cheap 304. An optional
+    ResponseCache answers repeated queries from disk without touching the network.
+
+    Only the ETags are held in memory when there is a ResponseCache: a 304 is
+    answered with the body stored on disk, even if that entry has expired.
+    Without one, the bodies are kept in memory too, at most max_etag_bytes of
+    them (counted as response sizes), least recently used dropped first.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, pool_size: int = 16, max_retries: int = 5,
+                 backoff_factor: float = 0.5, timeout: float = 30, max_etags: int = 1024,
+                 max_etag_bytes: int = 32 * 1024 * 1024, cache=None):
+        self.base_url = base_url
+        self.cache = cache
+        self.timeout = timeout
+        self.max_etags = max_etags
+        self.max_etag_bytes = max_etag_bytes
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            # Hand the last response back so raise_for_status reports the real status
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # url -> (etag, decoded payload or None, response size), least recently used first
+        self._etags = OrderedDict()
+        self._etag_bytes = 0
+        self._lock = threading.Lock()
+
+    def build_url(self, params=None) -> str:
+        if params:
+            return f"{self.base_url}?{urlencode(params)}"
+        return self.base_url
+
+    def get_json(self, params=None, use_cache: bool = True):
+        """
+        GET the endpoint with params and return the decoded JSON. Raises on HTTP errors.
+
+        use_cache=False skips reading a fresh cached answer, but what the network
+        returns is still written to the cache.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.base_url, params)
+            if use_cache:
+                payload = self.cache.get(cache_key)
+                if payload is not None:
+                    return payload
+
+        payload = self._get_json(params, cache_key)
+        if cache_key is not None:
+            self.cache.set(cache_key, payload)
+        return payload
+
+    def _get_json(self, params=None, cache_key: str = None):
+        url = self.build_url(params)
+
+        headers = {}
+        with self._lock:
+            cached = self._etags.get(url)
+        stale = None
+        if cached:
+            stale = cached[1] if cache_key is None else self.cache.get(cache_key, allow_stale=True)
+            # No body to fall back on, so a 304 would be useless
+            if stale is not None:
+                headers["If-None-Match"] = cached[0]
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and stale is not None:
+            with self._lock:
+                if url in self._etags:
+                    self._etags.move_to_end(url)
+            return stale
+
+        response.raise_for_status()
+        payload = response.json()
+
+        etag = response.headers.get("ETag")
+        if etag:
+            # With a cache the body is on disk; get_json writes it there after we return
+            size = 0 if cache_key is not None else len(response.content)
+            self._remember(url, (etag, payload if cache_key is None else None, size))
+        else:
+            self._forget(url)
+        return payload
+
+    def _remember(self, url: str, entry):
+        self._forget(url)
+        with self._lock:
+            self._etags[url] = entry
+            self._etag_bytes += entry[2]
+            while self._etags and (len(self._etags) > self.max_etags or
+                                   self._etag_bytes > self.max_etag_bytes):
+                _, dropped = self._etags.popitem(last=False)
+                self._etag_bytes -= dropped[2]
+
+    def _forget(self, url: str):
+        with self._lock:
+            dropped = self._etags.pop(url, None)
+            if dropped is not None:
+                self._etag_bytes -= dropped[2]
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> PolymarketClient:
+    """Return the process-wide client, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = PolymarketClient()
+        return _default_client
+
+
+def configure_default_client(**kwargs) -> PolymarketClient:
+    """Replace the process-wide client, e.g. configure_default_client(cache=ResponseCache())."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = PolymarketClient(**kwargs)
+        return _default_client
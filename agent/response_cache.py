@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+# Evicting to below the limit leaves room for several writes before the next scan
+EVICT_TO_FRACTION = 0.8
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "gamma")
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for decoded API responses.
+
+    Each entry lives in its own file named by the SHA-256 of the canonical
+    query (URL plus sorted params). Entries expire after ttl_seconds, and once
+    the directory grows past max_bytes the least recently read entries are
+    evicted; expired entries are kept until then as bodies for ETag
+    revalidation. File mtimes double as the LRU clock, so the cache survives
+    restarts without a separate index.
+
+    The directory is scanned once to learn its size; after that writes keep a
+    running total and only scan again once it passes max_bytes, evicting down
+    to EVICT_TO_FRACTION of it. Other
+    processes writing to the same directory are picked up at that rescan.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl_seconds: float = 3600,
+                 max_bytes: int = 256 * 1024 * 1024, bypass: bool = None):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # Bypassing skips reads but still refreshes entries with what the network returned
+        if bypass is None:
+            bypass = os.getenv("GAMMA_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+        self.bypass = bypass
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = None  # bytes on disk, counted on the first write
+        self._size_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: str, params=None) -> str:
+        """Hash the canonical form of a query, so param order never causes a miss."""
+        canonical = url
+        if params:
+            canonical += "?" + urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str, allow_stale: bool = False):
+        """
+        Return the cached payload, or None on a miss, an expired entry or bypass.
+
+        Expired entries stay on disk until evicted, so allow_stale=True can still
+        return one to answer a 304 Not Modified.
+        """
+        if self.bypass:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not allow_stale and time.time() - entry.get("stored_at", 0) > self.ttl_seconds:
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return entry["payload"]
+
+    def set(self, key: str, payload):
+        entry = {"stored_at": time.time(), "payload": payload}
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            size = os.path.getsize(tmp_path)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write cache entry {key}: {e}")
+            self._remove(tmp_path)
+            return
+
+        with self._size_lock:
+            if self._size is None:
+                over = True  # already includes this entry
+            else:
+                self._size += size - replaced
+                over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """If the cache is over max_bytes, drop the least recently used entries until it is under EVICT_TO_FRACTION of that."""
+        entries = []
+        total = 0
+        for item in os.scandir(self.cache_dir):
+            if not item.name.endswith(".json"):
+                continue
+            try:
+                stat = item.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, item.path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            entries.sort()
+            for mtime, size, path in entries:
+                if total <= self.max_bytes * EVICT_TO_FRACTION:
+                    break
+                self._remove(path)
+                total -= size
+        with self._size_lock:
+            self._size = total
+
+    def clear(self):
+        for item in os.scandir(self.cache_dir):
+            if item.name.endswith((".json", ".tmp")):
+                self._remove(item.path)
+        with self._size_lock:
+            self._size = 0
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,243 @@
+import json
+import os
+import sys
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.market_records import Event
+
+RULES_PATH = os.getenv("SCORING_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_rules.json"))
+
+# Used when scoring_rules.json is missing; keep the two in sync
+DEFAULT_SCORING_RULES = {
+    "featured_multiplier": 2,
+    "tag_boosts": {"198": 100},
+    "min_volume": 0,
+    "min_volume24hr": None,
+    "zero_resolved": True,
+}
+
+
+class CompiledRules:
+    """
+    Scoring policy compiled into lookup structures.
+
+    tag_weights maps a numeric tag id to its multiplier, so the scalar path does a
+    single dict lookup per tag. boost_tag_ids/boost_weights are the same table as
+    arrays, in the column order tag_bitmap uses for the vectorized masks.
+    """
+
+    def __init__(self, featured_multiplier: float, tag_weights: Dict[float, float], min_volume: float,
+                 min_volume24hr: Optional[float], zero_resolved: bool):
+        self.featured_multiplier = featured_multiplier
+        self.tag_weights = tag_weights
+        self.min_volume = min_volume
+        self.min_volume24hr = min_volume24hr
+        self.zero_resolved = zero_resolved
+        self.boost_tag_ids = sorted(tag_weights)
+        self.boost_weights = [tag_weights[tag_id] for tag_id in self.boost_tag_ids]
+
+
+def compile_rules(rules: Optional[Dict[str, Any]] = None) -> CompiledRules:
+    """
+    Compile a declarative rule set.
+
+    :param rules: Dict shaped like DEFAULT_SCORING_RULES; missing keys take the defaults.
+        tag_boosts maps tag id to multiplier; each boosted tag an event carries applies once.
+        Events with volume <= min_volume, or volume24hr < min_volume24hr, score 0.
+    """
+    merged = dict(DEFAULT_SCORING_RULES)
+    merged.update(rules or {})
+    unknown = set(merged) - set(DEFAULT_SCORING_RULES)
+    if unknown:
+        raise ValueError(f"Unknown scoring rules: {sorted(unknown)}")
+    return CompiledRules(
+        featured_multiplier=merged["featured_multiplier"],
+        tag_weights={float(tag_id): weight for tag_id, weight in merged["tag_boosts"].items()},
+        min_volume=merged["min_volume"],
+        min_volume24hr=merged["min_volume24hr"],
+        zero_resolved=bool(merged["zero_resolved"]),
+    )
+
+
+def load_rules(path: str = RULES_PATH) -> CompiledRules:
+    """Compile the rules in a JSON file, or the built-in defaults if it does not exist."""
+    if not os.path.exists(path):
+        return compile_rules()
+    with open(path, "r") as f:
+        return compile_rules(json.load(f))
+
+
+_default_rules = None
+
+
+def get_default_rules() -> CompiledRules:
+    """Rules from scoring_rules.json, compiled once per process."""
+    global _default_rules
+    if _default_rules is None:
+        _default_rules = load_rules()
+    return _default_rules
+
+
+def _segment_counts(mask: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Count True entries of a flat mask within each [offsets[i], offsets[i+1]) segment."""
+    cumulative = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+
+def _segment_max(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Per-segment max of a flat array; empty segments get 0."""
+    lengths = np.diff(offsets)
+    result = np.zeros(len(lengths), dtype=np.float64)
+    non_empty = lengths > 0
+    if non_empty.any():
+        # Empty segments have zero width, so reducing from each non-empty start to the next one is exact
+        result[non_empty] = np.maximum.reduceat(values, offsets[:-1][non_empty])
+    return result
+
+
+class EventColumns:
+    """
+    Columnar view of parsed markets for batch scoring.
+
+    Per-event fields are flat float arrays. Options and tags are ragged, so they
+    are stored flattened with an offsets array: the options of event i live in
+    option_*[option_offsets[i]:option_offsets[i + 1]], and likewise for tags.
+    Tag ids that are not numeric are stored as NaN, which never matches a tag id.
+    """
+
+    def __init__(self, volume, volume24hr, comment_count, featured,
+                 option_offsets, price_change, probability, tag_offsets, tag_ids):
+        self.volume = volume
+        self.volume24hr = volume24hr
+        self.comment_count = comment_count
+        self.featured = featured
+        self.option_offsets = option_offsets
+        self.price_change = price_change
+        self.probability = probability
+        self.tag_offsets = tag_offsets
+        self.tag_ids = tag_ids
+
+    def __len__(self):
+        return len(self.volume)
+
+    @classmethod
+    def from_markets(cls, markets: Sequence[Dict[str, Any]]) -> "EventColumns":
+        """Load parsed market dicts, as returned by parse_event."""
+        return cls._from_lists(
+            [market["volume"] for market in markets],
+            [market["volume24hr"] for market in markets],
+            [market["commentCount"] for market in markets],
+            [bool(market["featured"]) for market in markets],
+            [len(market["options"]) for market in markets],
+            [option.get("oneDayPriceChange", 0) for market in markets for option in market["options"]],
+            [option["probability"] for market in markets for option in market["options"]],
+            [len(market["tags"]) for market in markets],
+            [tag["id"] for market in markets for tag in market["tags"]],
+        )
+
+    @classmethod
+    def from_events(cls, events: Sequence[Event]) -> "EventColumns":
+        """Load slotted Event records."""
+        return cls._from_lists(
+            [event.volume for event in events],
+            [event.volume24hr for event in events],
+            [event.comment_count for event in events],
+            [bool(event.featured) for event in events],
+            [len(event.options) for event in events],
+            [option.one_day_price_change for event in events for option in event.options],
+            [option.probability for event in events for option in event.options],
+            [len(event.tags) for event in events],
+            [tag_id for event in events for tag_id, _ in event.tags],
+        )
+
+    @classmethod
+    def _from_lists(cls, volume, volume24hr, comment_count, featured,
+                    option_counts, price_change, probability, tag_counts, tag_ids) -> "EventColumns":
+        # One list comprehension per column, then a single conversion each: far cheaper than filling arrays per event
+        option_offsets = np.zeros(len(option_counts) + 1, dtype=np.int64)
+        np.cumsum(option_counts, out=option_offsets[1:])
+        tag_offsets = np.zeros(len(tag_counts) + 1, dtype=np.int64)
+        np.cumsum(tag_counts, out=tag_offsets[1:])
+        numeric_tag_ids = [tag_id if isinstance(tag_id, (int, float)) else np.nan for tag_id in tag_ids]
+        return cls(
+            np.asarray(volume, dtype=np.float64),
+            np.asarray(volume24hr, dtype=np.float64),
+            np.asarray(comment_count, dtype=np.float64),
+            np.asarray(featured, dtype=bool),
+            option_offsets,
+            np.asarray(price_change, dtype=np.float64),
+            np.asarray(probability, dtype=np.float64),
+            tag_offsets,
+            np.asarray(numeric_tag_ids, dtype=np.float64),
+        )
+
+    def tag_bitmap(self, tag_ids: Sequence[float]) -> np.ndarray:
+        """Boolean (events x tag_ids) matrix: does event i carry tag tag_ids[j]."""
+        bitmap = np.zeros((len(self), len(tag_ids)), dtype=bool)
+        for j, tag_id in enumerate(tag_ids):
+            bitmap[:, j] = _segment_counts(self.tag_ids == tag_id, self.tag_offsets) > 0
+        return bitmap
+
+
+def score_columns(columns: EventColumns, rules: Optional[CompiledRules] = None):
+    """
+    Compute interest scores for every event in a few vectorized passes.
+
+    Mirrors compute_interest_score in pm_market_getter operation for operation,
+    so the float results are bit-identical.
+
+    :return: (scores, is_zero) where is_zero marks events the scalar path scores as int 0
+    """
+    rules = rules or get_default_rules()
+    option_counts = np.diff(columns.option_offsets)
+    has_options = option_counts > 0
+
+    avg_price_change = np.zeros(len(columns), dtype=np.float64)
+    max_change = _segment_max(np.abs(columns.price_change), columns.option_offsets)
+    avg_price_change[has_options] = max_change[has_options] / option_counts[has_options]
+
+    positive_volume = columns.volume > rules.min_volume
+    if rules.min_volume24hr is not None:
+        positive_volume &= columns.volume24hr >= rules.min_volume24hr
+    base_score = np.zeros(len(columns), dtype=np.float64)
+    v = columns.volume[positive_volume]
+    v24 = columns.volume24hr[positive_volume]
+    base_score[positive_volume] = (avg_price_change[positive_volume] * v24 +
+                                   (columns.comment_count[positive_volume] * 100 * (v24 / v)))
+
+    scores = np.where(columns.featured, base_score * rules.featured_multiplier, base_score)
+    boost_masks = columns.tag_bitmap(rules.boost_tag_ids)
+    for j, weight in enumerate(rules.boost_weights):
+        scores = np.where(boost_masks[:, j], scores * weight, scores)
+
+    resolved = np.zeros(len(columns), dtype=bool)
+    if rules.zero_resolved:
+        # Resolved markets: any option at 100%, or every option at 0%
+        has_100 = _segment_counts(np.abs(columns.probability - 100) < 0.001, columns.option_offsets) > 0
+        all_zero = _segment_counts(np.abs(columns.probability) < 0.001, columns.option_offsets) == option_counts
+        resolved = has_options & (has_100 | all_zero)
+        scores[resolved] = 0
+
+    return scores, resolved | ~positive_volume
+
+
+def score_markets(markets: List[Dict[str, Any]], rules: Optional[CompiledRules] = None) -> np.ndarray:
+    """Score a batch of parsed markets in place and return the scores as an array."""
+    if not markets:
+        return np.zeros(0, dtype=np.float64)
+    scores, is_zero = score_columns(EventColumns.from_markets(markets), rules)
+    for market, score, zero in zip(markets, scores.tolist(), is_zero.tolist()):
+        market["interest_score"] = 0 if zero else score
+    return scores
+
+
+def score_events(events: List[Event], rules: Optional[CompiledRules] = None) -> np.ndarray:
+    """Score a batch of Event records in place and return the scores as an array."""
+    if not events:
+        return np.zeros(0, dtype=np.float64)
+    scores, is_zero = score_columns(EventColumns.from_events(events), rules)
+    for event, score, zero in zip(events, scores.tolist(), is_zero.tolist()):
+        event.interest_score = 0 if zero else score
+    return scores
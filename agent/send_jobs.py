@@ -0,0 +1,239 @@
+from typing import List, Dict, Optional, Tuple
+from email.utils import parseaddr
+import json
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from email_collection_app.backend.database import get_db_connection
+from agent.smtp_pool import SMTPSessionPool, deliver
+from agent.message_template import MessageTemplate
+
+# A claimed batch that isn't marked sent/failed within this time goes back to other workers
+DEFAULT_LEASE_SECONDS = 300
+
+# Sends of one recipient that fail are retried by later batches up to this many times
+MAX_ATTEMPTS = 3
+
+# How often a worker with nothing to claim checks whether other workers' leases have cleared
+LEASE_POLL_SECONDS = 5
+
+
+def create_job(html_content: str, emails: List[str], subject: str,
+               recipient_tokens: Dict[str, Dict[str, str]] = None) -> int:
+    """
+    Record a newsletter send: one send_jobs row with the rendered HTML and one
+    pending send_outbox row per recipient. Returns the job id.
+
+    :param recipient_tokens: Per-email values for $name placeholders in the HTML,
+        stored with each recipient so a resumed run renders the same message
+    """
+    recipient_tokens = recipient_tokens or {}
+    tokens = [json.dumps(recipient_tokens[email]) if email in recipient_tokens else None for email in emails]
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "INSERT INTO send_jobs (subject, html) VALUES (%s, %s) RETURNING id",
+            (subject, html_content)
+        )
+        job_id = cur.fetchone()[0]
+        cur.execute("""
+            INSERT INTO send_outbox (job_id, email, tokens)
+            SELECT %s, t.email, t.tokens::jsonb FROM unnest(%s::text[], %s::text[]) AS t(email, tokens)
+            ON CONFLICT DO NOTHING
+        """, (job_id, list(emails), tokens))
+        conn.commit()
+        print(f"Created send job {job_id} for {len(emails)} recipients")
+        return job_id
+    finally:
+        cur.close()
+        conn.close()
+
+
+def claim_batch(conn, job_id: int, batch_size: int = 50,
+                lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Dict[str, Optional[dict]]:
+    """
+    Lease up to batch_size pending recipients of a job to this worker.
+    Returns {email: tokens} for the leased recipients, in email order.
+
+    SKIP LOCKED lets several workers claim disjoint batches at once. Rows whose
+    lease ran out (the worker holding them died) are claimable again.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE send_outbox
+            SET leased_until = now() + %s * interval '1 second', attempts = attempts + 1
+            WHERE (job_id, email) IN (
+                SELECT job_id, email FROM send_outbox
+                WHERE job_id = %s AND status = 'pending'
+                  AND (leased_until IS NULL OR leased_until < now())
+                ORDER BY email
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING email, tokens
+        """, (lease_seconds, job_id, batch_size))
+        batch = {email: tokens for email, tokens in sorted(cur.fetchall())}
+        conn.commit()
+        return batch
+    finally:
+        cur.close()
+
+
+def record_results(conn, job_id: int, results: Dict[str, list]):
+    """Mark sent recipients, and release failed ones for a retry until they run out of attempts"""
+    cur = conn.cursor()
+    try:
+        if results['successful']:
+            cur.execute("""
+                UPDATE send_outbox
+                SET status = 'sent', sent_at = now(), leased_until = NULL, error = NULL
+                WHERE job_id = %s AND email = ANY(%s)
+            """, (job_id, results['successful']))
+        for failure in results['failed']:
+            cur.execute("""
+                UPDATE send_outbox
+                SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                    leased_until = NULL, error = %s
+                WHERE job_id = %s AND email = %s
+            """, (MAX_ATTEMPTS, failure['error'], job_id, failure['email']))
+        conn.commit()
+    finally:
+        cur.close()
+
+
+def finish_job_if_done(conn, job_id: int) -> bool:
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE send_jobs SET status = 'done', finished_at = now()
+            WHERE id = %s AND status <> 'done'
+              AND NOT EXISTS (SELECT 1 FROM send_outbox WHERE job_id = %s AND status = 'pending')
+            RETURNING id
+        """, (job_id, job_id))
+        done = cur.fetchone() is not None
+        conn.commit()
+        return done
+    finally:
+        cur.close()
+
+
+def leased_pending(conn, job_id: int) -> Tuple[int, Optional[float]]:
+    """
+    Pending recipients of a job that are leased right now, and the seconds until
+    the first of those leases runs out (None when there are none).
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT COUNT(*), EXTRACT(EPOCH FROM MIN(leased_until) - now())
+            FROM send_outbox
+            WHERE job_id = %s AND status = 'pending' AND leased_until >= now()
+        """, (job_id,))
+        count, seconds = cur.fetchone()
+        conn.commit()
+        return count, float(seconds) if seconds is not None else None
+    finally:
+        cur.close()
+
+
+def job_status(job_id: int) -> Optional[Dict]:
+    """Job status with recipient counts per outbox status, or None for an unknown job"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT status, created_at, finished_at FROM send_jobs WHERE id = %s", (job_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        cur.execute("SELECT status, COUNT(*) FROM send_outbox WHERE job_id = %s GROUP BY status", (job_id,))
+        counts = {status: count for status, count in cur.fetchall()}
+        return {"id": job_id, "status": row[0], "created_at": row[1], "finished_at": row[2], "recipients": counts}
+    finally:
+        cur.close()
+        conn.close()
+
+
+def run_job(job_id: int, smtp_config: dict, logo_data: Optional[bytes] = None, batch_size: int = 50,
+            workers: int = 4, rate: float = None, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+            wait_for_leases: bool = True) -> Dict[str, list]:
+    """
+    Send a job's pending recipients batch by batch until none are left.
+
+    Safe to run in several processes at once and to re-run after a crash: each
+    batch is leased before sending and marked right after, so at most the batch
+    in flight when a worker dies is sent again. When the only pending recipients
+    are leased (by another worker, or by one that crashed), this waits until they
+    are marked or their lease runs out and claims them, so a re-run right after a
+    crash still finishes the job.
+
+    :param wait_for_leases: Return instead of waiting when only leased recipients are left
+    :return: {'successful': [...], 'failed': [{'email', 'error'}]} for the recipients this call
+        handled, plus 'pending': how many recipients were still pending when it returned
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT subject, html FROM send_jobs WHERE id = %s", (job_id,))
+    row = cur.fetchone()
+    cur.close()
+    if row is None:
+        conn.close()
+        raise ValueError(f"Send job {job_id} not found")
+    subject, html_content = row
+
+    message = MessageTemplate(subject, smtp_config['from'], html_content, logo_data)
+    envelope_from = parseaddr(smtp_config['from'])[1]
+    if rate is None:
+        rate = smtp_config.get('max_per_second', 5)
+
+    batch = {}
+
+    def send_one(server, email):
+        server.sendmail(envelope_from, [email], message.render(email, batch.get(email)))
+
+    pool = SMTPSessionPool(smtp_config, size=workers)
+    results = {'successful': [], 'failed': [], 'pending': 0}
+    try:
+        pool.open()
+        while True:
+            batch = claim_batch(conn, job_id, batch_size, lease_seconds)
+            if not batch:
+                leased, expires_in = leased_pending(conn, job_id)
+                results['pending'] = leased
+                if not leased or not wait_for_leases:
+                    break
+                print(f"Job {job_id}: {leased} recipients leased elsewhere, first lease ends in {expires_in:.0f}s")
+                time.sleep(min(max(expires_in, 0) + 0.1, LEASE_POLL_SECONDS))
+                continue
+            batch_results = deliver(pool, list(batch), send_one, workers=workers, rate=rate)
+            record_results(conn, job_id, batch_results)
+            results['successful'].extend(batch_results['successful'])
+            results['failed'].extend(batch_results['failed'])
+            print(f"Job {job_id}: {len(results['successful'])} sent, {len(results['failed'])} failed so far")
+        if finish_job_if_done(conn, job_id):
+            print(f"Job {job_id} finished")
+        elif results['pending']:
+            print(f"Job {job_id}: {results['pending']} recipients still pending, run it again to finish")
+        return results
+    finally:
+        pool.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    # python agent/send_jobs.py <job_id> resumes (or joins) a send
+    from dotenv import load_dotenv
+    from agent.newsletter_sender import NewsletterSender
+    load_dotenv()
+    smtp_config = {
+        "host": "smtp.gmail.com",
+        "port": 587,
+        "auth": {
+            "user": "polynewsdailynewsletter@gmail.com",
+            "pass": os.getenv("SMTP_PASS")
+        },
+        "from": '"PolyNewsDaily Update" <polynewsdailynewsletter@gmail.com>'
+    }
+    run_job(int(sys.argv[1]), smtp_config, logo_data=NewsletterSender().logo_data)
@@ -0,0 +1,149 @@
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# Errors after which the session can't be trusted and is reopened before retrying
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` sends per second on average, bursts of up to `capacity`"""
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available. A rate of None or 0 never blocks."""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SMTPSessionPool:
+    """
+    A fixed number of logged-in SMTP sessions shared between sender threads.
+
+    Sessions are opened lazily, handed out one thread at a time, and reopened
+    when the server has dropped them.
+    """
+
+    def __init__(self, smtp_config: dict, size: int = 4, timeout: float = 30):
+        self.smtp_config = smtp_config
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.smtp_config['host'], self.smtp_config['port'], timeout=self.timeout)
+        server.starttls()
+        server.login(self.smtp_config['auth']['user'], self.smtp_config['auth']['pass'])
+        return server
+
+    def open(self):
+        """Log in one session up front so bad credentials fail the whole send immediately"""
+        server = self._idle.get()
+        try:
+            if server is None:
+                server = self._connect()
+        finally:
+            self._idle.put(server)
+
+    @staticmethod
+    def _discard(server: Optional[smtplib.SMTP]):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _session_broken(error: Exception) -> bool:
+        # 421: the server is closing this connection, e.g. after too many messages on it
+        return (isinstance(error, RECONNECT_ERRORS) or
+                (isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421))
+
+    def send(self, send_fn: Callable[[smtplib.SMTP], None]):
+        """
+        Run send_fn with an idle session, reopening the session and retrying once if it was dropped.
+
+        :param send_fn: Sends one message over the session it is given
+        """
+        server = self._idle.get()
+        try:
+            if server is None:
+                server = self._connect()
+            try:
+                send_fn(server)
+            except Exception as e:
+                if not self._session_broken(e):
+                    raise
+                self._discard(server)
+                server = None
+                server = self._connect()
+                send_fn(server)
+        except Exception as e:
+            # Don't hand a broken session to the next message
+            if self._session_broken(e):
+                self._discard(server)
+                server = None
+            raise
+        finally:
+            self._idle.put(server)
+
+    def close(self):
+        while not self._idle.empty():
+            self._discard(self._idle.get())
+
+
+def deliver(pool: SMTPSessionPool, recipients: List[str], send_one: Callable[[smtplib.SMTP, str], None],
+            workers: int = 4, rate: Optional[float] = None) -> Dict[str, list]:
+    """
+    Send to every recipient concurrently over the pool, at most `rate` messages per second overall.
+
+    :param send_one: Sends the message for one recipient over the given session
+    :return: {'successful': [email, ...], 'failed': [{'email': ..., 'error': ...}, ...]} in recipient order
+    """
+    bucket = TokenBucket(rate)
+
+    def send(email):
+        bucket.acquire()
+        try:
+            pool.send(lambda server: send_one(server, email))
+            print(f"Successfully sent to: {email}")
+            return None
+        except Exception as e:
+            print(f"Failed to send to {email}: {str(e)}")
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, pool.size))) as executor:
+        errors = list(executor.map(send, recipients))
+
+    results = {'successful': [], 'failed': []}
+    for email, error in zip(recipients, errors):
+        if error is None:
+            results['successful'].append(email)
+        else:
+            results['failed'].append({'email': email, 'error': error})
+    return results
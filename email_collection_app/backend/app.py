@@ -3,7 +3,9 @@ from flask_cors import CORS
 from email_validator import validate_email, EmailNotValidError
 import re
 import os
+import queue
 from database import get_db_connection, setup_database
+from delivery_worker import delivery_worker
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -19,6 +21,9 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+# Retry-After sent with a 503 when the delivery queue is full
+SEND_LATEST_RETRY_AFTER_SECONDS = 30
+
 # Add security headers to all responses
 @app.after_request
 def add_security_headers(response):
@@ -295,16 +300,17 @@ def unsubscribe():
 @app.route('/api/send-latest', methods=['POST'])
 def send_latest_newsletter():
     try:
-        # Lazy import to avoid requiring Pydantic at app startup
-        from agent.newsletter_sender import NewsletterSender
         data = request.get_json()
         email = data.get('email')
         
         if not email:
             return jsonify({'error': 'Email is required'}), 400
-            
-        # Initialize newsletter sender
-        newsletter_sender = NewsletterSender()
+
+        # Delivery happens in the background, so reject bad addresses while the caller is still here
+        sanitized_email = sanitize_input(email)
+        if not sanitized_email or not is_valid_email(sanitized_email):
+            logger.warning(f"Invalid email address: {email}")
+            return jsonify({'error': 'Invalid email address'}), 400
         
         # Get SMTP config from environment variables
         smtp_pass = os.getenv('SMTP_PASS')
@@ -323,19 +329,37 @@ def send_latest_newsletter():
             "from": '"PolyNewsDaily Update" <polynewsdailynewsletter@gmail.com>'
         }
 
-        # Send the latest newsletter
-        success = newsletter_sender.send_latest_to_subscriber(smtp_config, email)
-        
-        if success:
-            return jsonify({'message': 'Latest newsletter sent successfully'}), 200
-        else:
-            return jsonify({'error': 'Failed to send latest newsletter'}), 500
+        # Queue the send; a background worker delivers it with the shared, preloaded sender
+        try:
+            job_id = delivery_worker.submit(smtp_config, sanitized_email)
+        except queue.Full:
+            logger.warning("Delivery queue is full, asking the client to retry later")
+            response = jsonify({'error': 'Too many pending deliveries, please try again shortly'})
+            response.headers['Retry-After'] = str(SEND_LATEST_RETRY_AFTER_SECONDS)
+            return response, 503
+        logger.info(f"Queued latest newsletter for delivery as job {job_id}")
+        return jsonify({
+            'message': 'Latest newsletter queued for delivery',
+            'job_id': job_id,
+            'status_url': f'/api/send-latest/{job_id}'
+        }), 202
             
     except Exception as e:
-        logger.error(f"Error sending latest newsletter: {str(e)}")
+        logger.error(f"Error queueing latest newsletter: {str(e)}")
         # Don't include the actual error message in the response to avoid leaking sensitive info
         return jsonify({'error': 'Server error'}), 500
 
+@app.route('/api/send-latest/queue', methods=['GET'])
+def send_latest_queue():
+    return jsonify(delivery_worker.queue_depth()), 200
+
+@app.route('/api/send-latest/<job_id>', methods=['GET'])
+def send_latest_status(job_id):
+    job = delivery_worker.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
 if __name__ == '__main__':
     # Skip database setup for local testing to avoid refreshing the database
     # setup_database()
@@ -112,6 +112,38 @@ def setup_database():
 
 
         print("\nDatabase setup complete - latest_newsletter table created/verified.")
+
+        # One row per newsletter send, with the rendered HTML so a resumed run sends the same email
+        cur.execute('''
+        CREATE TABLE IF NOT EXISTS send_jobs (
+            id SERIAL PRIMARY KEY,
+            subject TEXT NOT NULL,
+            html TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+        ''')
+
+        # One row per recipient; workers lease pending rows with FOR UPDATE SKIP LOCKED
+        cur.execute('''
+        CREATE TABLE IF NOT EXISTS send_outbox (
+            job_id INTEGER REFERENCES send_jobs(id) ON DELETE CASCADE,
+            email VARCHAR(255) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            leased_until TIMESTAMP,
+            error TEXT,
+            sent_at TIMESTAMP,
+            tokens JSONB,
+            PRIMARY KEY (job_id, email)
+        );
+        ''')
+        cur.execute('''
+        CREATE INDEX IF NOT EXISTS send_outbox_pending ON send_outbox (job_id, status, leased_until);
+        ''')
+
+        print("\nDatabase setup complete - send_jobs and send_outbox tables created/verified.")
         
         
         # Check if table exists and show count
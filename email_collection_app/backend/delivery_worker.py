@@ -0,0 +1,127 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for status lookups: at most this many, for at most this long
+MAX_FINISHED_JOBS = 1000
+FINISHED_JOB_TTL_SECONDS = 3600
+
+# Jobs waiting for a free worker before submit starts turning requests away
+MAX_QUEUED_JOBS = 100
+
+
+class DeliveryWorker:
+    """
+    Background delivery of the latest newsletter, so /api/send-latest can return right away.
+
+    Jobs run on a small thread pool and share one NewsletterSender, so the
+    template, logo and rendered article fragments are loaded once per process
+    instead of once per request. Job status lives in memory: it is per process
+    and lost on restart, so with several gunicorn workers a status lookup has to
+    reach the process that accepted the job.
+
+    At most max_queued jobs wait for a worker; past that submit raises
+    queue.Full so the caller can shed load. Finished jobs are forgotten after
+    finished_ttl seconds, or sooner once more than MAX_FINISHED_JOBS have finished.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queued: int = MAX_QUEUED_JOBS,
+                 finished_ttl: float = FINISHED_JOB_TTL_SECONDS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="delivery")
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.finished_ttl = finished_ttl
+        self.jobs = {}
+        # job id -> monotonic finish time, oldest first
+        self.finished = OrderedDict()
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self._sender = None
+        self._sender_lock = threading.Lock()
+
+    def get_sender(self):
+        """The shared NewsletterSender, created on first use"""
+        if self._sender is None:
+            with self._sender_lock:
+                if self._sender is None:
+                    # Lazy import to avoid requiring Pydantic at app startup
+                    from agent.newsletter_sender import NewsletterSender
+                    self._sender = NewsletterSender()
+        return self._sender
+
+    def submit(self, smtp_config: dict, email: str) -> str:
+        """Queue the latest newsletter for email and return the job id. Raises queue.Full when the queue is full."""
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            if self.in_flight >= self.max_workers + self.max_queued:
+                raise queue.Full(f"{self.in_flight} delivery jobs already queued or sending")
+            self.in_flight += 1
+            self.jobs[job_id] = {
+                "id": job_id,
+                "email": email,
+                "status": "queued",
+                "error": None,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "finished_at": None,
+            }
+        try:
+            self.executor.submit(self._run, job_id, smtp_config, email)
+        except Exception:
+            with self.lock:
+                self.in_flight -= 1
+                del self.jobs[job_id]
+            raise
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, smtp_config: dict, email: str):
+        self._update(job_id, status="sending")
+        try:
+            success = self.get_sender().send_latest_to_subscriber(smtp_config, email)
+            error = None if success else "Failed to send latest newsletter"
+        except Exception as e:
+            logger.error(f"Error delivering job {job_id}: {str(e)}")
+            success, error = False, "Server error"
+        with self.lock:
+            self.jobs[job_id].update(status="sent" if success else "failed", error=error,
+                                     finished_at=datetime.now(timezone.utc).isoformat())
+            self.finished[job_id] = time.monotonic()
+            self.in_flight -= 1
+            self._forget_old_jobs()
+        logger.info(f"Delivery job {job_id} {'sent' if success else 'failed'}")
+
+    def _forget_old_jobs(self):
+        """Drop expired finished jobs, then the oldest beyond MAX_FINISHED_JOBS. Call with the lock held."""
+        expired_before = time.monotonic() - self.finished_ttl
+        while self.finished:
+            job_id, finished_at = next(iter(self.finished.items()))
+            if finished_at >= expired_before and len(self.finished) <= MAX_FINISHED_JOBS:
+                break
+            del self.finished[job_id]
+            del self.jobs[job_id]
+
+    def status(self, job_id: str):
+        with self.lock:
+            self._forget_old_jobs()
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def queue_depth(self) -> dict:
+        with self.lock:
+            queued = sum(1 for job in self.jobs.values() if job["status"] == "queued")
+            sending = sum(1 for job in self.jobs.values() if job["status"] == "sending")
+        return {"queued": queued, "sending": sending, "workers": self.max_workers,
+                "max_queued": self.max_queued}
+
+
+delivery_worker = DeliveryWorker()
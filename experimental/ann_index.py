@@ -0,0 +1,192 @@
+from typing import Optional
+
+import numpy as np
+
+from experimental.matching import normalize_rows, top_k_from_scores
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, n_iter: int = 15, seed: int = 0) -> np.ndarray:
+    """K-means on unit vectors using cosine similarity; returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        empty = counts == 0
+        if empty.any():
+            # Reseed empty lists with random points so every list stays in use
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums).astype(vectors.dtype)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over article embeddings.
+
+    Vectors are clustered into n_lists cells with spherical k-means. A query only
+    scores the vectors in its n_probe closest cells, so n_probe is the
+    recall-vs-latency knob: n_probe == n_lists is an exact search. Vectors can be
+    added at any time; until train_size vectors have arrived the index searches
+    them exhaustively, then trains itself on what it holds. Once it holds
+    retrain_growth times as many vectors as it was last trained on, it retrains,
+    so the cells keep following the data instead of the first few hundred
+    articles. Ids are insertion positions, so they line up with an articles list
+    grown in the same order.
+    """
+
+    def __init__(self, n_lists: int = 64, n_probe: int = 8, train_size: Optional[int] = None, seed: int = 0,
+                 retrain_growth: float = 2.0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size or 8 * n_lists
+        self.seed = seed
+        self.retrain_growth = retrain_growth
+        self.reset()
+
+    def reset(self):
+        """Drop every vector and the training, keeping the parameters."""
+        self.centroids = None
+        self.trained_count = 0
+        self._vectors = None
+        self._assignments = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self._lists = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors[:self._count]
+
+    def _grow(self, extra: int, dim: int):
+        needed = self._count + extra
+        if self._vectors is None:
+            self._vectors = np.zeros((max(needed, 1024), dim), dtype=np.float32)
+        elif needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), dim), dtype=np.float32)
+            grown[:self._count] = self._vectors[:self._count]
+            self._vectors = grown
+
+    def train(self):
+        """(Re)cluster every vector held so far and rebuild the inverted lists."""
+        if self._count == 0:
+            return
+        self.centroids = spherical_kmeans(self.vectors, self.n_lists, seed=self.seed)
+        self._assignments = self._assign(self.vectors)
+        self.trained_count = self._count
+        self._lists = None
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int64)
+
+    def add(self, embeddings) -> np.ndarray:
+        """Add embeddings and return their ids."""
+        vectors = normalize_rows(embeddings).astype(np.float32)
+        if len(vectors) == 0:
+            return np.zeros(0, dtype=np.int64)
+        self._grow(len(vectors), vectors.shape[1])
+        ids = np.arange(self._count, self._count + len(vectors))
+        self._vectors[ids] = vectors
+        self._count += len(vectors)
+
+        if self.centroids is None:
+            if self._count >= self.train_size:
+                self.train()
+        elif self.retrain_growth and self._count >= self.retrain_growth * self.trained_count:
+            self.train()
+        else:
+            self._assignments = np.concatenate([self._assignments, self._assign(vectors)])
+            self._lists = None
+        return ids
+
+    def _inverted_lists(self):
+        """Vectors regrouped so each list is one contiguous block, plus the ids and bounds of each block."""
+        if self._lists is None:
+            order = np.argsort(self._assignments, kind="stable")
+            bounds = np.searchsorted(self._assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, bounds, np.ascontiguousarray(self.vectors[order]))
+        return self._lists
+
+    def search(self, query_embeddings, k: int = 5, n_probe: Optional[int] = None) -> np.ndarray:
+        """
+        (len(queries), k) array of ids, most similar first, padded with -1 when
+        the probed lists hold fewer than k vectors.
+        """
+        queries = normalize_rows(query_embeddings).astype(np.float32)
+        results = np.full((len(queries), k), -1, dtype=np.int64)
+        if self._count == 0 or k <= 0:
+            return results
+
+        if self.centroids is None:
+            top = top_k_from_scores(queries @ self.vectors.T, k)
+            results[:, :top.shape[1]] = top
+            return results
+
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        order, bounds, list_vectors = self._inverted_lists()
+        probes = top_k_from_scores(queries @ self.centroids.T, n_probe)
+
+        # Score each probed list once for every query that probes it, then merge per query
+        candidate_ids = [[] for _ in range(len(queries))]
+        candidate_scores = [[] for _ in range(len(queries))]
+        for cell in np.unique(probes):
+            start, end = bounds[cell], bounds[cell + 1]
+            if start == end:
+                continue
+            probing = np.nonzero((probes == cell).any(axis=1))[0]
+            scores = queries[probing] @ list_vectors[start:end].T
+            for row, query_index in enumerate(probing):
+                candidate_ids[query_index].append(order[start:end])
+                candidate_scores[query_index].append(scores[row])
+
+        for i in range(len(queries)):
+            if not candidate_ids[i]:
+                continue
+            ids = np.concatenate(candidate_ids[i])
+            top = top_k_from_scores(np.concatenate(candidate_scores[i])[np.newaxis, :], k)[0]
+            results[i, :len(top)] = ids[top]
+        return results
+
+    @staticmethod
+    def _npz_path(path: str) -> str:
+        # np.savez appends .npz to names without it; load has to look for the same file
+        return path if path.endswith(".npz") else path + ".npz"
+
+    def save(self, path: str):
+        """Write the index to path, with .npz appended if it isn't there already."""
+        np.savez(
+            self._npz_path(path),
+            vectors=self.vectors,
+            assignments=self._assignments,
+            centroids=self.centroids if self.centroids is not None else np.zeros((0, 0), dtype=np.float32),
+            params=np.array([self.n_lists, self.n_probe, self.train_size, self.seed, self.trained_count],
+                            dtype=np.int64),
+            retrain_growth=np.array(self.retrain_growth, dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(cls._npz_path(path)) as data:
+            params = [int(x) for x in data["params"]]
+            n_lists, n_probe, train_size, seed = params[:4]
+            retrain_growth = float(data["retrain_growth"]) if "retrain_growth" in data else 2.0
+            index = cls(n_lists=n_lists, n_probe=n_probe, train_size=train_size, seed=seed,
+                        retrain_growth=retrain_growth)
+            vectors = data["vectors"]
+            if len(vectors):
+                index._grow(len(vectors), vectors.shape[1])
+                index._vectors[:len(vectors)] = vectors
+                index._count = len(vectors)
+            if data["centroids"].size:
+                index.centroids = data["centroids"]
+                index._assignments = data["assignments"]
+                # Files written before trained_count was saved: treat everything as trained on
+                index.trained_count = params[4] if len(params) > 4 else index._count
+        return index
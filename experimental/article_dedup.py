@@ -0,0 +1,132 @@
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"fbclid", "gclid", "cmpid", "ref", "smid", "mc_cid", "mc_eid", "ocid"}
+
+# Smallest prime above 2**32: a * h + b stays below 2**64 for 32-bit a, b and h
+_PRIME = 4294967311
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def canonical_url(url: Optional[str]) -> Optional[str]:
+    """
+    Normalize an article URL so syndicated and tracked copies compare equal.
+
+    Lowercases the scheme and host, drops "www.", the fragment, tracking
+    parameters (utm_* and friends) and any trailing slash.
+    """
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS]
+    path = parts.path.rstrip("/")
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme.lower(),
+                       host, path, urlencode(sorted(query)), ""))
+
+
+def article_text(article: Dict) -> str:
+    """Title and description, without the " - Source Name" suffix NewsAPI appends to titles."""
+    title = article.get("title") or ""
+    source = (article.get("source") or {}).get("name")
+    if source and title.endswith(f" - {source}"):
+        title = title[:-len(source) - 3]
+    return f"{title} {article.get('description') or ''}"
+
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """Hashed word n-grams of text; short texts fall back to single words."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        grams = words
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+
+
+class MinHasher:
+    """MinHash signatures over hashed shingles using num_perm universal hash functions."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        # Fixed seed so signatures are stable across runs
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, hashed_shingles: Set[int]) -> Tuple[int, ...]:
+        hashes = np.fromiter(hashed_shingles, dtype=np.uint64, count=len(hashed_shingles))
+        return tuple(((self.a * hashes + self.b) % np.uint64(_PRIME)).min(axis=1).tolist())
+
+
+def estimated_jaccard(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class ArticleDeduplicator:
+    """
+    Streaming duplicate filter for articles, so pages can be deduplicated as they arrive.
+
+    An article is dropped if its canonical URL was already seen, or if its
+    title and description are a near duplicate (estimated Jaccard similarity of
+    word 3-gram shingles >= threshold) of an article already kept. Candidates
+    are found with LSH banding over the MinHash signatures, so the cost grows
+    with the number of articles rather than the number of pairs. The first copy
+    of each story is kept.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.minhasher = MinHasher(num_perm)
+        self.seen_urls = set()
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self.kept_signatures: List[Tuple[int, ...]] = []
+        self.dropped = {"same_url": 0, "near_duplicate": 0}
+
+    def admit(self, article: Dict) -> bool:
+        """Record article and return True if it is not a duplicate of one admitted before."""
+        url = canonical_url(article.get("url"))
+        if url and url in self.seen_urls:
+            self.dropped["same_url"] += 1
+            return False
+
+        hashed = shingles(article_text(article))
+        if hashed:
+            signature = self.minhasher.signature(hashed)
+            rows = self.rows_per_band
+            band_keys = [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+            candidates = {i for key in band_keys for i in self.buckets.get(key, ())}
+            if any(estimated_jaccard(signature, self.kept_signatures[i]) >= self.threshold for i in candidates):
+                self.dropped["near_duplicate"] += 1
+                return False
+            for key in band_keys:
+                self.buckets.setdefault(key, []).append(len(self.kept_signatures))
+            self.kept_signatures.append(signature)
+
+        if url:
+            self.seen_urls.add(url)
+        return True
+
+    def filter(self, articles: Iterable[Dict]) -> List[Dict]:
+        return [article for article in articles if self.admit(article)]
+
+
+def dedupe_articles(articles: List[Dict], threshold: float = 0.8, num_perm: int = 64,
+                    bands: int = 16) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Drop articles that repeat an earlier one, preserving input order.
+
+    :return: (kept articles, {"same_url": n, "near_duplicate": n})
+    """
+    deduplicator = ArticleDeduplicator(threshold, num_perm, bands)
+    kept = deduplicator.filter(articles)
+    return kept, deduplicator.dropped
@@ -0,0 +1,115 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from experimental.model_registry import get_model
+
+_worker_model_name = None
+
+# One worker pool per process, reused by every encode_texts call: (model_name, workers, executor)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def length_buckets(texts: Sequence[str], batch_size: int) -> List[List[int]]:
+    """
+    Group text indices into batches of similar length.
+
+    Texts are ordered by length and cut into consecutive batches, so each batch
+    pads only up to its own longest text rather than the longest in the corpus.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def _init_worker(model_name: str, threads_per_worker: int):
+    global _worker_model_name
+    _worker_model_name = model_name
+    try:
+        import torch
+        # Each worker gets its share of the cores instead of every worker grabbing all of them
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    get_model(model_name)
+
+
+def _encode_in_worker(texts: List[str], batch_size: int) -> np.ndarray:
+    return get_model(_worker_model_name).encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+def get_pool(model_name: str, workers: int) -> ProcessPoolExecutor:
+    """
+    The shared worker pool for model_name, created on first use.
+
+    Workers are spawned rather than forked, so they never inherit torch/OpenMP
+    state from a parent that already loaded a model, and each loads the model
+    once in its initializer. Asking for another model or worker count replaces
+    the pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[:2] == (model_name, workers):
+            return _pool[2]
+        if _pool is not None:
+            _pool[2].shutdown(wait=False, cancel_futures=True)
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker, initargs=(model_name, threads_per_worker))
+        _pool = (model_name, workers, executor)
+        return executor
+
+
+@atexit.register
+def shutdown_pool():
+    """Stop the shared worker pool, e.g. to free the workers' models in a long-running process."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool[2].shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def encode_texts(texts: Sequence[str], model=None, model_name: Optional[str] = None,
+                 batch_size: int = 32, workers: int = 0, verbose: bool = True) -> np.ndarray:
+    """
+    Encode texts in length buckets and return embeddings in input order.
+
+    :param model: Loaded SentenceTransformer, used when workers <= 1
+    :param model_name: Model to load in each worker process when workers > 1
+    :param batch_size: Texts per encode call
+    :param workers: Number of processes to fan out over on CPU-only hosts (0 or 1 stays in process);
+        the processes are kept for later calls, see get_pool
+    """
+    texts = list(texts)
+    start = time.perf_counter()
+    buckets = length_buckets(texts, batch_size)
+
+    if workers > 1 and len(buckets) > 1:
+        if not model_name:
+            raise ValueError("model_name is required to encode with worker processes")
+        executor = get_pool(model_name, workers)
+        encoded = list(executor.map(
+            _encode_in_worker, [[texts[i] for i in bucket] for bucket in buckets], [batch_size] * len(buckets)
+        ))
+    else:
+        model = model if model is not None else get_model(model_name)
+        encoded = [model.encode([texts[i] for i in bucket], batch_size=batch_size, show_progress_bar=False)
+                   for bucket in buckets]
+
+    if not encoded:
+        return np.zeros((0, 0), dtype=np.float32)
+    embeddings = np.empty((len(texts), encoded[0].shape[1]), dtype=encoded[0].dtype)
+    for bucket, vectors in zip(buckets, encoded):
+        embeddings[bucket] = vectors
+
+    if verbose:
+        elapsed = time.perf_counter() - start
+        print(f"Encoded {len(texts)} texts in {elapsed:.2f}s ({len(texts) / max(elapsed, 1e-9):.1f} texts/sec)")
+    return embeddings
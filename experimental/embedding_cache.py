@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+from experimental.quantization import QuantizedMatrix, row_dtype
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "embeddings")
+
+VECTOR_SUFFIXES = {"float32": ".f32", "float16": ".f16", "int8": ".i8"}
+
+HASH_RE = re.compile(r"[0-9a-f]{40}")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache for one model, keyed by the hash of each text.
+
+    Vectors live in an append-only file that is read through a memory map, so
+    looking up a few hundred rows never loads the whole file. They are stored as
+    float32, float16 or int8 with a per-row scale depending on precision, and
+    always returned as float32. A text index file holds one "<sha1> <row>" line
+    per vector. Vectors are written and fsynced before their index lines. On
+    load, a partial row left by an interrupted write is cut off the vectors
+    file, and index lines that are malformed, unterminated or point past the
+    last full row are dropped, so a crash costs at most re-encoding the texts
+    being appended. Meant for a single writer process.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = DEFAULT_CACHE_DIR, precision: str = "float32"):
+        if precision not in VECTOR_SUFFIXES:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {tuple(VECTOR_SUFFIXES)}")
+        self.model_name = model_name
+        self.precision = precision
+        os.makedirs(cache_dir, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        if precision != "float32":
+            safe_name = f"{safe_name}.{precision}"
+        self.vectors_path = os.path.join(cache_dir, f"{safe_name}{VECTOR_SUFFIXES[precision]}")
+        self.index_path = os.path.join(cache_dir, f"{safe_name}.index")
+        self.meta_path = os.path.join(cache_dir, f"{safe_name}.meta.json")
+        self.dim = None
+        self.rows = {}
+        self._vectors = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                self.dim = json.load(f)["dim"]
+        row_count = self._truncate_partial_row()
+        if not os.path.exists(self.index_path):
+            return
+
+        dropped = 0
+        with open(self.index_path, "r") as f:
+            for line in f:
+                parts = line.split()
+                # An unterminated last line may have lost digits of its row number
+                if (not line.endswith("\n") or len(parts) != 2 or not HASH_RE.fullmatch(parts[0])
+                        or not parts[1].isdigit() or int(parts[1]) >= row_count):
+                    dropped += 1
+                    continue
+                self.rows[parts[0]] = int(parts[1])
+        if dropped:
+            print(f"Dropped {dropped} damaged embedding cache index entries for {self.model_name}")
+            self._rewrite_index()
+
+    def _truncate_partial_row(self) -> int:
+        """Cut an incomplete trailing row off the vectors file; returns the number of full rows."""
+        if self.dim is None or not os.path.exists(self.vectors_path):
+            return 0
+        row_size = row_dtype(self.precision, self.dim).itemsize
+        size = os.path.getsize(self.vectors_path)
+        if size % row_size:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(size - size % row_size)
+                f.flush()
+                os.fsync(f.fileno())
+        return size // row_size
+
+    def _rewrite_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for key, row in self.rows.items():
+                f.write(f"{key} {row}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def _row_count(self) -> int:
+        if self.dim is None or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // row_dtype(self.precision, self.dim).itemsize
+
+    def _map(self):
+        """Memory map of every vector on disk, refreshed after appends."""
+        if self._vectors is None:
+            count = self._row_count()
+            if count == 0:
+                return np.zeros(0, dtype=row_dtype(self.precision, self.dim or 0))
+            self._vectors = np.memmap(self.vectors_path, dtype=row_dtype(self.precision, self.dim), mode="r", shape=(count,))
+        return self._vectors
+
+    def _append(self, hashes: List[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            tmp_path = self.meta_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"model": self.model_name, "dim": self.dim, "dtype": self.precision}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.meta_path)
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} does not match cached dim {self.dim}")
+
+        # A write that failed earlier in this process may have left a partial row
+        start = self._truncate_partial_row()
+        with open(self.vectors_path, "ab") as f:
+            f.write(QuantizedMatrix.from_float(vectors, self.precision).to_records().tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, "a") as f:
+            f.write("".join(f"{key} {start + offset}\n" for offset, key in enumerate(hashes)))
+            f.flush()
+            os.fsync(f.fileno())
+        for offset, key in enumerate(hashes):
+            self.rows[key] = start + offset
+        self._vectors = None
+
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for texts in order, calling encode_fn only for unseen texts.
+
+        :param encode_fn: Encodes a list of texts into a (len, dim) array, e.g. model.encode
+        """
+        hashes = [text_hash(text) for text in texts]
+        with self._lock:
+            missing = {}
+            for key, text in zip(hashes, texts):
+                if key not in self.rows and key not in missing:
+                    missing[key] = text
+            if missing:
+                self._append(list(missing), np.asarray(encode_fn(list(missing.values()))))
+
+            if not texts:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            rows = self._map()[[self.rows[key] for key in hashes]]
+            return QuantizedMatrix.from_records(rows, self.precision).to_float()
+
+    def __len__(self):
+        return len(self.rows)
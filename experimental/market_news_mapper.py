@@ -1,87 +1,195 @@
 import os
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from agent.pm_market_getter import get_markets_for_date_range
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+from agent.event_store import EventStore, sync_events
+from agent.polymarket_client import configure_default_client
+from agent.response_cache import ResponseCache
+from experimental.model_registry import DEFAULT_MODEL_NAME, get_model, warm_up
+from experimental.article_dedup import ArticleDeduplicator, dedupe_articles
 
 load_dotenv()
 
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 NEWS_API_URL = "https://newsapi.org/v2/top-headlines"
+MARKET_CACHE_TTL = 3600
+
+def fetch_news_page(page, page_size=100):
+    params = {
+        "country": "us",
+        "apiKey": NEWS_API_KEY,
+        "pageSize": page_size,
+        "page": page
+    }
+    try:
+        response = requests.get(NEWS_API_URL, params=params, timeout=30)
+        response.raise_for_status()
+        articles = response.json().get("articles", [])
+        print(f"Successfully fetched {len(articles)} articles from page {page}")
+        return articles
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching news for page {page}: {e}")
+        return []
+
+def get_news_articles(pages=1, max_workers=4, dedupe=True):  # Changed to default to 1 page
+    """
+    Fetch pages of top headlines concurrently and drop duplicate stories.
+
+    :param max_workers: Upper bound on concurrent page requests
+    :param dedupe: Drop repeated URLs and near-duplicate wire copies before they reach the encoder
+    """
+    # map keeps page order; a failed page no longer stops the others
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, pages))) as executor:
+        all_articles = [article for page in executor.map(fetch_news_page, range(1, pages + 1)) for article in page]
 
-def get_news_articles(pages=1):  # Changed to default to 1 page
-    all_articles = []
-    for page in range(1, pages + 1):
-        params = {
-            "country": "us",
-            "apiKey": NEWS_API_KEY,
-            "pageSize": 100,
-            "page": page
-        }
-        try:
-            response = requests.get(NEWS_API_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-            articles = data.get("articles", [])
-            all_articles.extend(articles)
-            print(f"Successfully fetched {len(articles)} articles from page {page}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching news for page {page}: {e}")
-            break  # Stop trying to fetch more pages if we hit an error
-    
     print(f"Total articles fetched: {len(all_articles)}")
+    if dedupe:
+        all_articles, dropped = dedupe_articles(all_articles)
+        print(f"Dropped {dropped['same_url']} articles with a repeated URL and "
+              f"{dropped['near_duplicate']} near-duplicates, {len(all_articles)} left")
     return all_articles
 
-def create_embeddings(texts, model):
-    return model.encode(texts)
+def create_embeddings(texts, model=None, model_name=DEFAULT_MODEL_NAME, batch_size=32, workers=0):
+    # Length-bucketed batches; workers > 1 fans out over processes that each load model_name
+    from experimental.batch_encoding import encode_texts
+    return encode_texts(texts, model=model, model_name=model_name, batch_size=batch_size, workers=workers)
+
+def embedding_text(item):
+    return f"{item['title']} {item['description']}"
+
+def make_encoder(model_name=DEFAULT_MODEL_NAME, use_cache=True, batch_size=32, encode_workers=0, precision="float32"):
+    """
+    Return a function that embeds a list of texts.
+
+    The model is only loaded if some text is missing from the embedding cache.
+    """
+    def encode(texts):
+        model = get_model(model_name) if encode_workers <= 1 else None
+        return create_embeddings(texts, model, model_name, batch_size, encode_workers)
 
-def map_markets_to_articles(markets, articles):
+    if not use_cache:
+        return encode
+    from experimental.embedding_cache import EmbeddingCache
+    cache = EmbeddingCache(model_name, precision=precision)
+    return lambda texts: cache.encode(texts, encode)
+
+def map_markets_to_articles(markets, articles, model_name=DEFAULT_MODEL_NAME, use_cache=True, ann_index=None,
+                            batch_size=32, encode_workers=0, article_embeddings=None, precision="float32"):
+    """
+    Map each market title to its 5 most similar articles.
+
+    :param batch_size: Texts per encode call
+    :param encode_workers: Encode in this many processes on CPU-only hosts (0 keeps it in process)
+    :param ann_index: Optional IVFIndex whose ids line up with `articles`; articles past
+        len(ann_index) are treated as new arrivals and added before searching. An
+        index holding more vectors than there are articles is rebuilt from `articles`
+    :param article_embeddings: Embeddings already computed for `articles`, e.g. while pages were downloading
+    :param precision: "float32", "float16" or "int8" for the cached and compared embeddings
+        (see tools/report_quantization.py for how much the top 5 moves)
+    """
     if not markets or not articles:
         print("Error: No markets or articles to process")
         return {}
 
+    # Matching-stage imports are deferred so fetching and scoring start without them
+    from experimental.matching import top_k_matches
+
     try:
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        encode = make_encoder(model_name, use_cache, batch_size, encode_workers, precision)
+        market_embeddings = encode([embedding_text(m) for m in markets])
+        if article_embeddings is None:
+            article_embeddings = encode([embedding_text(a) for a in articles])
     except Exception as e:
-        print(f"Error loading SentenceTransformer model: {e}")
+        print(f"Error creating embeddings with SentenceTransformer model: {e}")
         return {}
-
-    market_texts = [f"{m['title']} {m['description']}" for m in markets]
-    article_texts = [f"{a['title']} {a['description']}" for a in articles]
-    
-    market_embeddings = create_embeddings(market_texts, model)
-    article_embeddings = create_embeddings(article_texts, model)
-    
-    similarities = cosine_similarity(market_embeddings, article_embeddings)
     
+    if ann_index is not None:
+        if len(ann_index) > len(articles):
+            # Its ids would point past the end of articles; it was built for another list
+            print(f"ANN index holds {len(ann_index)} vectors for {len(articles)} articles, rebuilding it")
+            ann_index.reset()
+        if len(ann_index) < len(articles):
+            ann_index.add(article_embeddings[len(ann_index):])
+        related_indices = ann_index.search(market_embeddings, k=5)
+    else:
+        # Top 5 related articles per market, without materializing the full similarity matrix
+        related_indices = top_k_matches(market_embeddings, article_embeddings, k=5, precision=precision)
+
     market_article_map = {}
-    for i, market in enumerate(markets):
-        related_articles_indices = np.argsort(similarities[i])[::-1][:5]  # Top 5 related articles
-        related_articles = [articles[idx] for idx in related_articles_indices]
+    for market, related_articles_indices in zip(markets, related_indices):
+        related_articles = [articles[idx] for idx in related_articles_indices if idx >= 0]
         market_article_map[market['title']] = related_articles
     
     return market_article_map
 
+def load_top_markets(days_in_past=100, k=30):
+    start = time.perf_counter()
+    configure_default_client(cache=ResponseCache(ttl_seconds=MARKET_CACHE_TTL))
+    store = EventStore()
+    try:
+        # A rerun within the TTL reads the store without touching the network
+        sync_events(store, days_in_past=days_in_past, page_size=100, min_interval=MARKET_CACHE_TTL)
+        print(f"Number of markets stored: {store.count()}")
+        return store.top_markets(k, days_in_past=days_in_past)
+    finally:
+        store.close()
+        print(f"Market sync finished in {time.perf_counter() - start:.2f}s")
+
+def run_pipeline(days_in_past=100, k=30, pages=1, model_name=DEFAULT_MODEL_NAME, precision="float32"):
+    """
+    Fetch markets and news and map them, overlapping the slow stages.
+
+    The market sync, every news page request and the model load all start at
+    once. Each news page is deduplicated and encoded as soon as it arrives,
+    while later pages and the market sync are still in flight, so wall time
+    tends towards the slowest stage rather than the sum of them.
+    """
+    start = time.perf_counter()
+    warm_up([model_name], background=True)
+    encode = make_encoder(model_name, precision=precision)
+    deduplicator = ArticleDeduplicator()
+    articles, article_embeddings = [], []
+
+    executor = ThreadPoolExecutor(max_workers=1 + pages)
+    try:
+        market_future = executor.submit(load_top_markets, days_in_past, k)
+        page_futures = [executor.submit(fetch_news_page, page) for page in range(1, pages + 1)]
+        for future in as_completed(page_futures):
+            page_articles = deduplicator.filter(future.result())
+            if not page_articles:
+                continue
+            try:
+                article_embeddings.append(encode([embedding_text(a) for a in page_articles]))
+            except Exception as e:
+                print(f"Error creating embeddings with SentenceTransformer model: {e}")
+                return {}
+            articles.extend(page_articles)
+        print(f"News fetched and encoded after {time.perf_counter() - start:.2f}s: {len(articles)} articles, "
+              f"dropped {deduplicator.dropped['same_url']} repeated URLs and "
+              f"{deduplicator.dropped['near_duplicate']} near-duplicates")
+
+        if not articles:
+            print("Error: No articles retrieved. Exiting.")
+            return {}
+        top_markets = market_future.result()
+    finally:
+        # Returning early must not block on the market sync: drop whatever hasn't started and leave the rest behind
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    import numpy as np
+    market_article_map = map_markets_to_articles(top_markets, articles, model_name=model_name,
+                                                 article_embeddings=np.concatenate(article_embeddings),
+                                                 precision=precision)
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
+    return market_article_map
+
 def main():
     if not NEWS_API_KEY:
         print("Error: NEWS_API_KEY not found in .env file")
         return
 
-    markets = get_markets_for_date_range(days_in_past=100, limit=20)
-    print(f"Number of markets retrieved: {len(markets)}")
-    sorted_markets_by_interest = sorted(markets, key=lambda x: x.get('interest_score', 0), reverse=True)
-    top_markets = sorted_markets_by_interest[:30]
-    
-    articles = get_news_articles()  # Now only fetches 1 page by default
-    
-    if not articles:
-        print("Error: No articles retrieved. Exiting.")
-        return
-
-    market_article_map = map_markets_to_articles(top_markets, articles)
-    
+    market_article_map = run_pipeline(days_in_past=100, k=30, pages=1)
     
     for market_title, related_articles in market_article_map.items():
         print(f"Market: {market_title}")
@@ -90,4 +198,4 @@ def main():
         print()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
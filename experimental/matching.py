@@ -0,0 +1,93 @@
+import numpy as np
+
+from experimental.quantization import QuantizedMatrix
+
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def normalize_rows(embeddings) -> np.ndarray:
+    """L2-normalize each row the way sklearn's normalize does; all-zero rows stay zero."""
+    embeddings = np.asarray(embeddings)
+    if embeddings.dtype not in (np.float32, np.float64):
+        embeddings = embeddings.astype(np.float64)
+    norms = np.sqrt(np.einsum("ij,ij->i", embeddings, embeddings))
+    norms[norms == 0.0] = 1.0
+    return embeddings / norms[:, np.newaxis]
+
+
+def top_k_from_scores(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Column indices of the k largest scores in each row, best first.
+
+    Ties go to the higher index, i.e. the order of
+    np.argsort(row, kind="stable")[::-1]. The default (quicksort) argsort orders
+    ties arbitrarily, so it can disagree on tied scores. argpartition keeps this
+    O(M) per row instead of O(M log M).
+    """
+    n_rows, n_cols = scores.shape
+    k = min(k, n_cols)
+    if k <= 0:
+        return np.zeros((n_rows, 0), dtype=np.intp)
+    if k < n_cols:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_cols), (n_rows, n_cols))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    # lexsort sorts by the last key first: score descending, then index descending
+    order = np.lexsort((-candidates, -candidate_scores), axis=-1)
+    result = np.array(np.take_along_axis(candidates, order, axis=1))
+
+    if k < n_cols:
+        # argpartition picks arbitrarily among scores tied at the k-th place; redo those rows
+        kth = candidate_scores.min(axis=1)
+        tied_rows = np.nonzero((scores >= kth[:, np.newaxis]).sum(axis=1) > k)[0]
+        for row in tied_rows:
+            cols = np.nonzero(scores[row] >= kth[row])[0]
+            result[row] = cols[np.lexsort((-cols, -scores[row, cols]))[:k]]
+    return result
+
+
+class ArticleMatcher:
+    """
+    Exact cosine top-k matcher over a fixed set of article embeddings.
+
+    Articles are normalized once. Queries are processed in chunks of chunk_size
+    rows, each through a single matmul, so peak memory is chunk_size x articles
+    scores rather than the full markets x articles matrix. With precision
+    "float16" or "int8" the normalized articles are held at that precision.
+    """
+
+    def __init__(self, article_embeddings, chunk_size: int = DEFAULT_CHUNK_SIZE, precision: str = "float32"):
+        self.article_matrix = normalize_rows(article_embeddings)
+        self.chunk_size = chunk_size
+        self.precision = precision
+        self.quantized = None
+        if precision != "float32":
+            self.quantized = QuantizedMatrix.from_float(self.article_matrix, precision)
+            self.article_matrix = None
+
+    def search(self, query_embeddings, k: int = 5) -> np.ndarray:
+        """(len(queries), k) array of article indices, most similar first."""
+        queries = normalize_rows(query_embeddings)
+        n_articles = len(self.quantized) if self.quantized is not None else len(self.article_matrix)
+        k = min(k, n_articles)
+        results = np.empty((len(queries), k), dtype=np.intp)
+        for start in range(0, len(queries), self.chunk_size):
+            chunk = queries[start:start + self.chunk_size]
+            if self.quantized is not None:
+                scores = self.quantized.dot(chunk)
+            else:
+                scores = chunk @ self.article_matrix.T
+            results[start:start + len(chunk)] = top_k_from_scores(scores, k)
+        return results
+
+
+def top_k_matches(market_embeddings, article_embeddings, k: int = 5,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, precision: str = "float32") -> np.ndarray:
+    """
+    Top k articles per market by cosine similarity, best first.
+
+    Same as np.argsort(cosine_similarity(markets, articles), axis=1, kind="stable")[:, ::-1][:, :k]:
+    tied articles (e.g. duplicates) come out highest index first.
+    """
+    return ArticleMatcher(article_embeddings, chunk_size, precision).search(market_embeddings, k)
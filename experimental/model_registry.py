@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Directory holding pre-downloaded models, one sub-directory per model name
+MODEL_DIR = os.getenv("SENTENCE_MODEL_DIR")
+
+# Loaded models keyed by the name or directory they were loaded from
+_models: Dict[str, object] = {}
+_model_paths: Dict[str, str] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def register_model_path(name: str, path: str):
+    """Load model `name` from a local directory instead of the Hugging Face hub."""
+    _model_paths[name] = path
+
+
+def _resolve_path(name: str, local_path: Optional[str]) -> str:
+    if local_path:
+        return local_path
+    if name in _model_paths:
+        return _model_paths[name]
+    if MODEL_DIR and os.path.isdir(os.path.join(MODEL_DIR, name)):
+        return os.path.join(MODEL_DIR, name)
+    return name
+
+
+def get_model(name: str = DEFAULT_MODEL_NAME, local_path: Optional[str] = None):
+    """
+    Return the SentenceTransformer for `name`, loading it at most once per process.
+
+    Models are cached by the path they load from, so get_model(name, local_path=...)
+    never hands back a copy loaded from somewhere else. Loads are serialized per
+    path, so concurrent callers wait for the first load instead of each building
+    their own copy.
+    """
+    path = _resolve_path(name, local_path)
+    model = _models.get(path)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        lock = _locks.setdefault(path, threading.Lock())
+    with lock:
+        model = _models.get(path)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(path)
+            _models[path] = model
+    return model
+
+
+def warm_up(names: Iterable[str] = (DEFAULT_MODEL_NAME,), background: bool = False):
+    """
+    Load models ahead of first use.
+
+    :param background: Load in a daemon thread and return it, so startup is not blocked
+    """
+    def load():
+        for name in names:
+            try:
+                get_model(name)
+            except Exception as e:
+                print(f"Error warming up model {name}: {e}")
+
+    if background:
+        thread = threading.Thread(target=load, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+    load()
+    return None
+
+
+def clear():
+    """Drop every loaded model, e.g. to free memory in a long-running worker."""
+    with _registry_lock:
+        _models.clear()
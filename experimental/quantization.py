@@ -0,0 +1,93 @@
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Rows upcast to float32 at a time when scoring, bounding the temporary copy
+DEFAULT_BLOCK_SIZE = 4096
+
+
+def row_dtype(precision: str, dim: int) -> np.dtype:
+    """On-disk layout of one embedding row; int8 rows carry their float32 scale in front."""
+    if precision == "float32":
+        return np.dtype(("<f4", (dim,)))
+    if precision == "float16":
+        return np.dtype(("<f2", (dim,)))
+    if precision == "int8":
+        return np.dtype([("scale", "<f4"), ("codes", "i1", (dim,))])
+    raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+
+
+class QuantizedMatrix:
+    """
+    Embedding rows held as float32, float16 or int8 codes with one float32 scale per row.
+
+    int8 uses symmetric scalar quantization: each row is divided by
+    max(|x|) / 127 and rounded, so a unit vector keeps about two decimal digits
+    per component. Scores are computed block by block, upcasting only
+    block_size rows to float32 at a time for the BLAS matmul, so memory stays at
+    the reduced size.
+    """
+
+    def __init__(self, codes: np.ndarray, precision: str, scales: np.ndarray = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        self.codes = codes
+        self.precision = precision
+        self.scales = scales
+        self.block_size = block_size
+
+    @classmethod
+    def from_float(cls, embeddings, precision: str = "float32", block_size: int = DEFAULT_BLOCK_SIZE) -> "QuantizedMatrix":
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if precision == "float32":
+            return cls(np.ascontiguousarray(embeddings), precision, block_size=block_size)
+        if precision == "float16":
+            return cls(embeddings.astype(np.float16), precision, block_size=block_size)
+        if precision == "int8":
+            scales = np.abs(embeddings).max(axis=1) / 127.0 if len(embeddings) else np.zeros(0, dtype=np.float32)
+            scales[scales == 0.0] = 1.0
+            codes = np.clip(np.rint(embeddings / scales[:, np.newaxis]), -127, 127).astype(np.int8)
+            return cls(codes, precision, scales.astype(np.float32), block_size=block_size)
+        raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+
+    @classmethod
+    def from_records(cls, records: np.ndarray, precision: str) -> "QuantizedMatrix":
+        """Wrap rows read back in the row_dtype layout."""
+        if precision == "int8":
+            return cls(records["codes"], precision, records["scale"])
+        return cls(records, precision)
+
+    def to_records(self) -> np.ndarray:
+        """Rows in the row_dtype layout, ready to append to a file."""
+        if self.precision != "int8":
+            return self.codes
+        records = np.empty(len(self.codes), dtype=row_dtype("int8", self.codes.shape[1]))
+        records["scale"] = self.scales
+        records["codes"] = self.codes
+        return records
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def to_float(self, start: int = 0, end: int = None) -> np.ndarray:
+        block = self.codes[start:end].astype(np.float32)
+        if self.scales is not None:
+            block *= self.scales[start:end, np.newaxis]
+        return block
+
+    def dot(self, queries: np.ndarray) -> np.ndarray:
+        """queries @ rows.T as float32, (len(queries), len(self))."""
+        if self.precision == "float32":
+            return np.asarray(queries, dtype=np.float32) @ self.codes.T
+        queries = np.asarray(queries, dtype=np.float32)
+        scores = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), self.block_size):
+            block = self.codes[start:start + self.block_size].astype(np.float32)
+            np.matmul(queries, block.T, out=scores[:, start:start + len(block)])
+            if self.scales is not None:
+                # Scaling the scores is cheaper than scaling the block it came from
+                scores[:, start:start + len(block)] *= self.scales[start:start + len(block)]
+        return scores
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from experimental import market_news_mapper
+from experimental.ann_index import IVFIndex
+
+
+def clustered(rng, n, dim=16, centers=8):
+    anchors = rng.normal(size=(centers, dim))
+    return (anchors[rng.integers(centers, size=n)] + 0.1 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+@pytest.mark.parametrize("name", ["index", "index.npz"])
+def test_save_load_round_trip(tmp_path, name):
+    rng = np.random.default_rng(0)
+    index = IVFIndex(n_lists=4, n_probe=2, train_size=40)
+    index.add(clustered(rng, 100))
+    queries = clustered(rng, 10)
+
+    path = str(tmp_path / name)
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == len(index)
+    assert loaded.trained_count == index.trained_count
+    np.testing.assert_array_equal(loaded.centroids, index.centroids)
+    np.testing.assert_array_equal(loaded.search(queries, k=5), index.search(queries, k=5))
+
+
+def test_untrained_index_round_trips(tmp_path):
+    index = IVFIndex(n_lists=4, train_size=1000)
+    index.add(clustered(np.random.default_rng(1), 10))
+    index.save(str(tmp_path / "small"))
+    loaded = IVFIndex.load(str(tmp_path / "small"))
+    assert loaded.centroids is None and len(loaded) == 10
+
+
+def test_retrains_after_growing_past_its_training_size():
+    rng = np.random.default_rng(2)
+    index = IVFIndex(n_lists=4, train_size=50)
+    index.add(clustered(rng, 60))
+    assert index.trained_count == 60
+    index.add(clustered(rng, 50))
+    assert index.trained_count == 60
+    index.add(clustered(rng, 20))
+    assert index.trained_count == 130
+    # Every vector is assigned, so a full probe is an exact search
+    queries = clustered(rng, 5)
+    exact = np.argsort(-(queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ index.vectors.T, axis=1)[:, :3]
+    np.testing.assert_array_equal(index.search(queries, k=3, n_probe=4), exact)
+
+
+def test_mapper_rebuilds_an_index_larger_than_the_article_list(monkeypatch):
+    rng = np.random.default_rng(3)
+    articles = [{"title": f"article {i}", "description": ""} for i in range(5)]
+    markets = [{"title": "market", "description": ""}]
+    article_embeddings = clustered(rng, len(articles))
+    monkeypatch.setattr(market_news_mapper, "make_encoder",
+                        lambda *args, **kwargs: lambda texts: clustered(rng, len(texts)))
+
+    index = IVFIndex(n_lists=2, train_size=10)
+    index.add(clustered(rng, 50))
+    result = market_news_mapper.map_markets_to_articles(markets, articles, ann_index=index,
+                                                        article_embeddings=article_embeddings)
+    assert len(index) == len(articles)
+    assert len(result["market"]) == 5
@@ -0,0 +1,16 @@
+from experimental import batch_encoding
+
+
+def test_worker_pool_is_spawned_once_and_reused():
+    try:
+        pool = batch_encoding.get_pool("model-a", 2)
+        assert batch_encoding.get_pool("model-a", 2) is pool
+        assert pool._mp_context.get_start_method() == "spawn"
+
+        # Another model replaces the pool instead of keeping both
+        other = batch_encoding.get_pool("model-b", 2)
+        assert other is not pool
+        assert batch_encoding._pool[2] is other
+    finally:
+        batch_encoding.shutdown_pool()
+    assert batch_encoding._pool is None
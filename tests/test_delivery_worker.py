@@ -0,0 +1,82 @@
+import os
+import queue
+import threading
+
+import pytest
+
+from email_collection_app.backend import delivery_worker as delivery_module
+from email_collection_app.backend.delivery_worker import DeliveryWorker
+
+SMTP_CONFIG = {"from": "news@example.com"}
+
+
+class BlockingSender:
+    """Holds every send until released, so jobs pile up in the queue"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def send_latest_to_subscriber(self, smtp_config, email):
+        self.release.wait(5)
+        return True
+
+
+def make_worker(sender, **kwargs):
+    worker = DeliveryWorker(**kwargs)
+    worker._sender = sender
+    return worker
+
+
+def wait_for(worker, *job_ids):
+    worker.executor.shutdown(wait=True)
+    return [worker.status(job_id) for job_id in job_ids]
+
+
+def test_submit_raises_when_the_queue_is_full():
+    sender = BlockingSender()
+    worker = make_worker(sender, max_workers=1, max_queued=2)
+    job_ids = [worker.submit(SMTP_CONFIG, f"r{i}@example.com") for i in range(3)]
+    with pytest.raises(queue.Full):
+        worker.submit(SMTP_CONFIG, "late@example.com")
+    assert len(worker.jobs) == 3
+
+    sender.release.set()
+    assert all(job["status"] == "sent" for job in wait_for(worker, *job_ids))
+    assert worker.in_flight == 0
+
+
+def test_finished_jobs_expire_and_are_capped(monkeypatch):
+    sender = BlockingSender()
+    sender.release.set()
+    worker = make_worker(sender, max_workers=2, max_queued=100, finished_ttl=60)
+    monkeypatch.setattr(delivery_module, "MAX_FINISHED_JOBS", 5)
+    job_ids = [worker.submit(SMTP_CONFIG, f"r{i}@example.com") for i in range(8)]
+    wait_for(worker)
+    assert len(worker.jobs) == 5
+
+    clock = [delivery_module.time.monotonic() + 61]
+    monkeypatch.setattr(delivery_module.time, "monotonic", lambda: clock[0])
+    assert worker.status(job_ids[-1]) is None
+    assert not worker.jobs and not worker.finished
+
+
+def test_send_latest_returns_503_with_retry_after_when_full(monkeypatch):
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+    pytest.importorskip("email_validator")
+    pytest.importorskip("psycopg")
+    backend = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "email_collection_app", "backend")
+    monkeypatch.syspath_prepend(backend)
+    monkeypatch.setenv("SMTP_PASS", "secret")
+    import app as backend_app
+
+    full = make_worker(BlockingSender(), max_workers=1, max_queued=0)
+    full.submit(SMTP_CONFIG, "first@example.com")
+    monkeypatch.setattr(backend_app, "delivery_worker", full)
+
+    response = backend_app.app.test_client().post("/api/send-latest", json={"email": "reader@example.com"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(backend_app.SEND_LATEST_RETRY_AFTER_SECONDS)
+    full._sender.release.set()
+    full.executor.shutdown(wait=True)
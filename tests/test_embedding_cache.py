@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from experimental.embedding_cache import EmbeddingCache, text_hash
+
+DIM = 8
+
+
+def fake_encode(texts):
+    """Deterministic per-text vectors so every lookup can be checked exactly."""
+    return np.stack([np.random.default_rng(int(text_hash(t)[:8], 16)).normal(size=DIM) for t in texts]).astype(np.float32)
+
+
+@pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+def test_truncated_row_is_cut_and_later_appends_line_up(tmp_path, precision):
+    cache = EmbeddingCache("model", str(tmp_path), precision)
+    first = [f"text {i}" for i in range(5)]
+    expected_first = cache.encode(first, fake_encode)
+
+    # Simulate a crash mid-append: half a row reached the vectors file, no index line
+    row_size = os.path.getsize(cache.vectors_path) // 5
+    with open(cache.vectors_path, "ab") as f:
+        f.write(b"\x01" * (row_size // 2))
+
+    reopened = EmbeddingCache("model", str(tmp_path), precision)
+    assert os.path.getsize(reopened.vectors_path) == 5 * row_size
+    second = [f"later {i}" for i in range(3)]
+    got = reopened.encode(first + second, fake_encode)
+    np.testing.assert_array_equal(got[:5], expected_first)
+    np.testing.assert_array_equal(got[5:], EmbeddingCache("model", str(tmp_path), precision).encode(second, fake_encode))
+    if precision == "float32":
+        np.testing.assert_array_equal(got[5:], fake_encode(second))
+
+
+def test_damaged_index_lines_are_dropped(tmp_path):
+    cache = EmbeddingCache("model", str(tmp_path))
+    texts = [f"text {i}" for i in range(12)]
+    cache.encode(texts, fake_encode)
+
+    with open(cache.index_path, "a") as f:
+        f.write("not-a-hash 3\n")
+        f.write(f"{text_hash('ghost')} 99\n")
+        # Unterminated last line whose row number lost a digit ("11" -> "1")
+        f.write(f"{text_hash('text 11')} 1")
+
+    reopened = EmbeddingCache("model", str(tmp_path))
+    assert len(reopened) == 12
+    assert text_hash("ghost") not in reopened.rows
+    calls = []
+    got = reopened.encode(texts, lambda t: calls.append(t) or fake_encode(t))
+    assert not calls
+    np.testing.assert_array_equal(got, fake_encode(texts))
+    # The rewritten index parses cleanly
+    with open(reopened.index_path) as f:
+        assert all(line.endswith("\n") and len(line.split()) == 2 for line in f)
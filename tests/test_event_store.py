@@ -0,0 +1,147 @@
+import datetime
+import threading
+
+import pytest
+
+from agent import pm_market_getter
+from agent.event_store import EventStore, sync_events
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+def iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
+
+
+class FakeGamma:
+    """Filters and pages a fixed list of events the way the /events endpoint does"""
+
+    def __init__(self, events):
+        self.events = events
+        self.requests = []
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def fetch_events(self, params=None, client=None):
+        with self.lock:
+            self.requests.append(dict(params))
+            self.threads.add(threading.get_ident())
+        events = self.events
+        if params.get('active') == 'true':
+            events = [e for e in events if e.get('active', True)]
+        if 'start_date_min' in params:
+            events = [e for e in events if parse(e['startDate']) >= parse(params['start_date_min'])]
+        if 'start_date_max' in params:
+            events = [e for e in events if parse(e['startDate']) <= parse(params['start_date_max'])]
+        if params.get('order') == 'updatedAt':
+            events = sorted(events, key=lambda e: e['updatedAt'], reverse=params.get('ascending') == 'false')
+        offset, limit = int(params['offset']), int(params['limit'])
+        return events[offset:offset + limit]
+
+
+def make_event(i, hours_ago, updated_hours_ago, **fields):
+    event = {
+        'ticker': f't{i}',
+        'title': f'Event {i}',
+        'startDate': iso(NOW - datetime.timedelta(hours=hours_ago)),
+        'updatedAt': iso(NOW - datetime.timedelta(hours=updated_hours_ago)),
+        'volume24hr': i,
+        'active': True,
+        'closed': False,
+    }
+    event.update(fields)
+    return event
+
+
+@pytest.fixture
+def gamma(monkeypatch):
+    events = [make_event(i, hours_ago=3 + i * 5, updated_hours_ago=2 + i % 7) for i in range(40)]
+    events.append(make_event(99, hours_ago=10, updated_hours_ago=1, active=False))
+    gamma = FakeGamma(events)
+    monkeypatch.setattr(pm_market_getter, 'fetch_events', gamma.fetch_events)
+    return gamma
+
+
+def test_first_sync_fetches_day_windows_concurrently(tmp_path, gamma):
+    store = EventStore(str(tmp_path / 'events.sqlite3'))
+    stats = sync_events(store, days_in_past=7, page_size=5, max_workers=4)
+
+    windows = {(r['start_date_min'], r.get('start_date_max')) for r in gamma.requests}
+    assert len(windows) == 7
+    assert all(r.get('active') == 'true' for r in gamma.requests)
+    assert len(gamma.threads) > 1
+    start = min(parse(low) for low, _ in windows)
+    expected = {e['ticker'] for e in gamma.events if e['active'] and start <= parse(e['startDate'])}
+    assert {m['ticker'] for m in store.top_markets(100)} == expected
+    assert stats['parsed'] == store.count() == len(expected)
+    assert store.get_watermark(7) is not None
+
+
+def test_events_starting_after_the_top_of_the_hour_are_not_missed(tmp_path, gamma):
+    # Starts (and was last updated) after the hour-aligned bounds the sync uses
+    gamma.events.append(make_event(200, hours_ago=0, updated_hours_ago=0,
+                                   startDate=iso(NOW + datetime.timedelta(minutes=1))))
+    store = EventStore(str(tmp_path / 'events.sqlite3'))
+    sync_events(store, days_in_past=7, page_size=5, max_workers=4)
+    assert 't200' in {m['ticker'] for m in store.top_markets(100)}
+
+    sync_events(store, days_in_past=7, page_size=5)
+    assert 't200' in {m['ticker'] for m in store.top_markets(100)}
+
+
+def test_later_syncs_stop_at_the_watermark_and_keep_the_active_filter(tmp_path, gamma):
+    store = EventStore(str(tmp_path / 'events.sqlite3'))
+    sync_events(store, days_in_past=7, page_size=5, max_workers=4)
+    count = store.count()
+
+    gamma.requests.clear()
+    stats = sync_events(store, days_in_past=7, page_size=5)
+    assert stats == {'seen': 0, 'parsed': 0, 'skipped': 0}
+    assert len(gamma.requests) == 1
+    assert gamma.requests[0]['active'] == 'true'
+
+    # An event closes, which bumps its updatedAt while it stays active
+    gamma.events[0].update(closed=True, updatedAt=iso(NOW))
+    gamma.requests.clear()
+    stats = sync_events(store, days_in_past=7, page_size=5)
+    assert stats['parsed'] == 1
+    assert len(gamma.requests) == 1
+    assert store.count() == count
+    assert 't0' not in {m['ticker'] for m in store.top_markets(100)}
+
+
+def test_rerun_within_min_interval_sends_no_requests(tmp_path, gamma):
+    store = EventStore(str(tmp_path / 'events.sqlite3'))
+    sync_events(store, days_in_past=7, page_size=5, max_workers=4, min_interval=3600)
+    count = store.count()
+
+    gamma.requests.clear()
+    assert sync_events(store, days_in_past=7, page_size=5, min_interval=3600)['seen'] == 0
+    # Last synced in the previous hour: still fresh, whatever the clock says now
+    store.set_synced_at(7, NOW - datetime.timedelta(minutes=59))
+    sync_events(store, days_in_past=7, page_size=5, min_interval=3600)
+    assert gamma.requests == []
+    assert store.count() == count
+
+    # Other window sizes keep their own sync time
+    sync_events(store, days_in_past=3, page_size=5, min_interval=3600)
+    assert gamma.requests
+
+    gamma.requests.clear()
+    store.set_synced_at(7, NOW - datetime.timedelta(minutes=61))
+    sync_events(store, days_in_past=7, page_size=5, min_interval=3600)
+    assert len(gamma.requests) == 1
+
+
+def test_stored_markets_are_what_parse_event_returns(tmp_path, gamma):
+    store = EventStore(str(tmp_path / 'events.sqlite3'))
+    sync_events(store, days_in_past=7, page_size=5, max_workers=4)
+    stored = {m['ticker']: m for m in store.top_markets(100)}
+    assert stored
+    for event in gamma.events:
+        if event['ticker'] in stored:
+            assert stored[event['ticker']] == pm_market_getter.parse_event(event)
@@ -0,0 +1,30 @@
+import threading
+import time
+
+from experimental import market_news_mapper
+
+
+def test_run_pipeline_does_not_wait_for_the_market_sync_after_an_encode_error(monkeypatch):
+    release = threading.Event()
+
+    def slow_market_sync(days_in_past, k):
+        release.wait(10)
+        return []
+
+    def failing_encoder(*args, **kwargs):
+        def encode(texts):
+            raise RuntimeError("model failed to load")
+        return encode
+
+    monkeypatch.setattr(market_news_mapper, "load_top_markets", slow_market_sync)
+    monkeypatch.setattr(market_news_mapper, "fetch_news_page",
+                        lambda page: [{"title": f"story {page}", "description": "", "url": f"https://example.com/{page}"}])
+    monkeypatch.setattr(market_news_mapper, "make_encoder", failing_encoder)
+    monkeypatch.setattr(market_news_mapper, "warm_up", lambda *args, **kwargs: None)
+
+    start = time.perf_counter()
+    try:
+        assert market_news_mapper.run_pipeline(pages=2) == {}
+        assert time.perf_counter() - start < 5
+    finally:
+        release.set()
@@ -0,0 +1,67 @@
+import datetime
+import json
+
+import pytest
+
+from agent import pm_market_getter
+from agent.market_records import Event
+from agent.market_selection import dedupe_markets, interest_key
+from tools.synthetic_data import make_raw_events
+
+
+def test_missing_counts_serialize_as_int_zero():
+    event = {"title": "Bare", "ticker": "bare", "markets": [{"outcomePrices": '["0.5"]', "outcomes": '["Yes"]'}]}
+    market = pm_market_getter.parse_event(event)
+    assert market["commentCount"] == 0 and type(market["commentCount"]) is int
+    last_trade_price = market["options"][0]["last_trade_price"]
+    assert last_trade_price == 0 and type(last_trade_price) is int
+    assert '"commentCount": 0,' in json.dumps(market)
+
+
+def test_get_reads_scalar_fields_by_dict_key():
+    raw = make_raw_events(1)[0]
+    record = Event.from_raw(raw)
+    market = record.to_dict()
+    for key in ("interest_score", "title", "ticker", "volume", "volume24hr", "commentCount", "featured"):
+        assert record.get(key) == market[key]
+    assert record.get("options") is None
+    assert record.get("missing", "N/A") == "N/A"
+
+
+DAYS = 5
+END_DATE = datetime.datetime(2025, 1, 10, 12)
+
+
+class WindowedGamma:
+    """Each day window gets its own 30 events, plus the first event of the next window (a shared boundary)"""
+
+    def __init__(self, events):
+        self.events = events
+        self.windows = {params["start_date_min"]: i for i, params in
+                        enumerate(pm_market_getter._date_range_params(DAYS, 7, 0, END_DATE))}
+
+    def fetch_events(self, params=None, client=None):
+        window = self.windows[params["start_date_min"]]
+        events = self.events[window * 30:(window + 1) * 30 + 1]
+        offset, limit = int(params["offset"]), int(params["limit"])
+        return events[offset:offset + limit]
+
+
+@pytest.fixture
+def raw_events(monkeypatch):
+    events = make_raw_events(300, seed=3)
+    monkeypatch.setattr(pm_market_getter, "fetch_events", WindowedGamma(events).fetch_events)
+    return events
+
+
+def test_date_range_markets_serialize_like_parse_event(raw_events):
+    markets = pm_market_getter.get_markets_for_date_range(DAYS, limit=7, max_workers=3, paginate=True,
+                                                         end_date=END_DATE)
+    expected, _ = dedupe_markets([pm_market_getter.parse_event(event) for event in raw_events[:151]])
+    assert json.dumps(markets) == json.dumps(expected)
+
+
+def test_top_markets_are_dicts_of_the_best_records(raw_events):
+    top = pm_market_getter.get_top_markets_for_date_range(DAYS, k=10, limit=7, end_date=END_DATE)
+    parsed, _ = dedupe_markets([pm_market_getter.parse_event(event) for event in raw_events[:151]])
+    assert json.dumps(top) == json.dumps(sorted(parsed, key=interest_key, reverse=True)[:10])
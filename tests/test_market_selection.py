@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from agent.market_selection import WindowedTopMarkets, dedupe_markets, interest_key, select_top_markets, top_k
+
+
+def reference_top(markets, k):
+    return sorted(dedupe_markets(markets)[0], key=interest_key, reverse=True)[:k]
+
+
+def random_windows(rng, n_windows, per_window, n_tickers):
+    """Windows whose tickers only repeat within a window or across a shared boundary with the next one."""
+    windows, arrival = [], 0
+    for w in range(n_windows):
+        window = []
+        for _ in range(rng.randint(0, per_window)):
+            pool = [f"w{w}-{rng.randrange(n_tickers)}"] * 6
+            pool += [f"b{w}-{rng.randrange(n_tickers)}"] * 2  # shared with the next window
+            if w:
+                pool += [f"b{w - 1}-{rng.randrange(n_tickers)}"] * 2  # shared with the previous window
+            window.append({
+                "ticker": rng.choice(pool + [None, "N/A"]),
+                # Few distinct values so ties are common
+                "interest_score": rng.choice([0, 1, 2, 3, 5, 8]) if rng.random() < 0.7 else rng.random() * 10,
+                "volume24hr": rng.choice([0, 10, 10, 20, 50]),
+                "arrival": arrival,
+            })
+            arrival += 1
+        windows.append(window)
+    return windows
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_select_top_markets_matches_dedupe_then_sort(seed):
+    rng = random.Random(seed)
+    windows = random_windows(rng, rng.randint(0, 8), rng.randint(0, 30), rng.randint(1, 10))
+    markets = [market for window in windows for market in window]
+    k = rng.choice([0, 1, 3, 12, 50])
+    expected = reference_top(markets, k)
+    got, dropped = select_top_markets((iter(window) for window in windows), k)
+    assert [m["arrival"] for m in got] == [m["arrival"] for m in expected]
+    assert dropped == dedupe_markets(markets)[1]
+
+
+def test_lower_scoring_replacement_lets_an_evicted_market_back_in():
+    windows = [
+        [{"ticker": "a", "interest_score": 10, "volume24hr": 1}, {"ticker": "b", "interest_score": 5, "volume24hr": 1}],
+        [{"ticker": "a", "interest_score": 1, "volume24hr": 2}],
+        [{"ticker": "c", "interest_score": 0, "volume24hr": 1}],
+    ]
+    got, _ = select_top_markets(windows, 1)
+    assert got == reference_top([m for w in windows for m in w], 1) == [windows[0][1]]
+
+
+def test_memory_is_bounded_by_k_and_two_windows():
+    selector = WindowedTopMarkets(5)
+    for w in range(50):
+        selector.add_window({"ticker": f"{w}-{j}", "interest_score": (w * 20 + j) % 97, "volume24hr": 0}
+                            for j in range(20))
+        assert len(selector.final) <= 5
+        assert len(selector._previous) + len(selector._current) <= 40
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_top_k_matches_sorted(seed):
+    rng = random.Random(seed)
+    items = [{"interest_score": rng.choice([0, 1, 2, 3]), "i": i} for i in range(rng.randint(0, 80))]
+    k = rng.randint(0, 20)
+    assert top_k(items, k) == sorted(items, key=interest_key, reverse=True)[:k]
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from experimental.matching import normalize_rows, top_k_from_scores, top_k_matches
+
+
+def stable_top_k(scores, k):
+    return np.argsort(scores, axis=1, kind="stable")[:, ::-1][:, :k]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_top_k_from_scores_orders_ties_like_a_stable_argsort(seed):
+    rng = np.random.default_rng(seed)
+    # A handful of distinct values, so most rows tie, including at the k-th place
+    scores = rng.integers(0, 4, size=(rng.integers(1, 20), rng.integers(1, 40))).astype(np.float32)
+    k = int(rng.integers(1, scores.shape[1] + 2))
+    np.testing.assert_array_equal(top_k_from_scores(scores, k), stable_top_k(scores, k))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_top_k_matches_with_duplicate_articles(seed):
+    rng = np.random.default_rng(seed)
+    articles = rng.normal(size=(30, 16)).astype(np.float32)
+    # Repeated articles score exactly the same for every market
+    articles[rng.integers(0, 30, size=10)] = articles[rng.integers(0, 30, size=10)]
+    markets = rng.normal(size=(7, 16)).astype(np.float32)
+    scores = normalize_rows(markets) @ normalize_rows(articles).T
+    np.testing.assert_array_equal(top_k_matches(markets, articles, k=5), stable_top_k(scores, 5))
@@ -0,0 +1,116 @@
+import json
+import time
+
+from agent.polymarket_client import PolymarketClient
+from agent.response_cache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, etag=None):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode() if payload is not None else b""
+        self.headers = {"ETag": etag} if etag else {}
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Serves one page per offset; answers 304 when If-None-Match matches the page's ETag"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        offset = int(url.rsplit("offset=", 1)[1])
+        self.requests.append((offset, dict(headers or {})))
+        payload = self.pages[offset]
+        etag = f'"{offset}-{len(json.dumps(payload))}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, payload, etag)
+
+    def close(self):
+        pass
+
+
+def make_client(pages, **kwargs):
+    client = PolymarketClient(base_url="https://example.com/events", **kwargs)
+    client.session = FakeSession(pages)
+    return client
+
+
+def test_etags_without_payloads_when_cached_on_disk(tmp_path):
+    pages = {i: [{"id": i, "title": "x" * 100}] for i in range(5)}
+    client = make_client(pages, cache=ResponseCache(str(tmp_path), ttl_seconds=60))
+    for i in pages:
+        assert client.get_json({"offset": i}) == pages[i]
+    assert all(entry[1] is None for entry in client._etags.values())
+    assert client._etag_bytes == 0
+
+    # Entries expire, the revalidation is a 304 and the body comes from disk
+    for path in tmp_path.iterdir():
+        entry = json.loads(path.read_text())
+        entry["stored_at"] = time.time() - 3600
+        path.write_text(json.dumps(entry))
+    client.session.requests.clear()
+    for i in pages:
+        assert client.get_json({"offset": i}) == pages[i]
+    assert all("If-None-Match" in headers for _, headers in client.session.requests)
+
+
+def test_no_conditional_request_when_the_disk_body_is_gone(tmp_path):
+    pages = {0: [{"id": 0}]}
+    cache = ResponseCache(str(tmp_path))
+    client = make_client(pages, cache=cache)
+    client.get_json({"offset": 0})
+    cache.clear()
+    client.session.requests.clear()
+    assert client.get_json({"offset": 0}) == pages[0]
+    assert client.session.requests == [(0, {})]
+
+
+def test_in_memory_bodies_are_capped_by_bytes():
+    pages = {i: [{"id": i, "title": "x" * 1000}] for i in range(50)}
+    client = make_client(pages, max_etag_bytes=10_000)
+    for i in pages:
+        client.get_json({"offset": i})
+    assert client._etag_bytes <= 10_000
+    assert client._etag_bytes == sum(entry[2] for entry in client._etags.values())
+    assert 0 < len(client._etags) < len(pages)
+
+    # Still-remembered pages revalidate with a 304 and return the same body
+    client.session.requests.clear()
+    assert client.get_json({"offset": 49}) == pages[49]
+    assert client.session.requests[0][1].get("If-None-Match")
+
+
+def test_cache_writes_only_scan_the_directory_when_over_the_limit(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), max_bytes=10_000)
+    scans = []
+    real_evict = ResponseCache.evict
+    monkeypatch.setattr(ResponseCache, "evict", lambda self: scans.append(1) or real_evict(self))
+
+    payload = [{"title": "x" * 900}]
+    for i in range(8):
+        cache.set(str(i), payload)
+    # Only the first write counts what is on disk
+    assert len(scans) == 1
+    # Overwriting an entry does not grow the total
+    for _ in range(5):
+        cache.set("0", payload)
+    assert len(scans) == 1
+
+    for i in range(8, 20):
+        cache.set(str(i), payload)
+    # Each eviction frees room for a couple of entries before the next scan
+    assert 1 < len(scans) <= 6
+    on_disk = sum(item.stat().st_size for item in tmp_path.iterdir() if item.name.endswith(".json"))
+    assert on_disk <= 10_000
+    assert cache._size == on_disk
+    assert cache.get("19") == payload
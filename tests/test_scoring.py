@@ -0,0 +1,38 @@
+import pytest
+
+from agent.market_records import Event
+from agent.pm_market_getter import compute_interest_score
+from agent.scoring import compile_rules, score_events, score_markets
+from tools.benchmark_scoring import inline_interest_score
+from tools.synthetic_data import make_raw_events
+
+CUSTOM_RULES = {"featured_multiplier": 3, "tag_boosts": {"198": 100, "2": 1.5}, "min_volume24hr": 10}
+
+
+def parsed_markets(seed, n=2000):
+    return [Event.from_raw(event).to_dict() for event in make_raw_events(n, seed)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_default_rules_score_exactly_like_the_inline_logic(seed):
+    markets = parsed_markets(seed)
+    rules = compile_rules()
+    inline_scores = [inline_interest_score(m) for m in markets]
+
+    assert [compute_interest_score(m, rules) for m in markets] == inline_scores
+    score_markets(markets, rules)
+    assert [m["interest_score"] for m in markets] == inline_scores
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_custom_rules_agree_between_scalar_and_batch_scoring(seed):
+    markets = parsed_markets(seed)
+    rules = compile_rules(CUSTOM_RULES)
+    scalar_scores = [compute_interest_score(m, rules) for m in markets]
+
+    score_markets(markets, rules)
+    assert [m["interest_score"] for m in markets] == scalar_scores
+
+    records = [Event.from_raw(event) for event in make_raw_events(len(markets), seed)]
+    score_events(records, rules)
+    assert [record.interest_score for record in records] == scalar_scores
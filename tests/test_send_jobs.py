@@ -0,0 +1,171 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("psycopg")
+pytest.importorskip("pydantic")
+
+from agent import send_jobs, smtp_pool
+from agent.newsletter_sender import Article, NewsletterSender
+from email_collection_app.backend import database
+
+# The outbox is plain Postgres SQL (SKIP LOCKED, leases), so these run against a real server:
+# TEST_DATABASE_URL=postgresql://... python -m pytest tests/test_send_jobs.py
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+SMTP_CONFIG = {
+    "host": "smtp.example.com",
+    "port": 587,
+    "auth": {"user": "user", "pass": "pass"},
+    "from": '"PolyNewsDaily Update" <news@example.com>',
+    "max_per_second": 0,
+}
+
+EMAILS = [f"reader{i:03d}@example.com" for i in range(120)]
+
+
+class Crash(BaseException):
+    """Stands in for the process dying; not an Exception, so nothing on the way up catches it"""
+
+
+class FakeSMTP:
+    delivered = []
+    crash_after = None
+
+    def __init__(self, host, port, timeout=None):
+        pass
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, sender, recipients, message):
+        if FakeSMTP.crash_after is not None and len(FakeSMTP.delivered) >= FakeSMTP.crash_after:
+            raise Crash()
+        FakeSMTP.delivered.append((recipients[0], message))
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    database.setup_database()
+    conn = database.get_db_connection()
+    conn.execute("TRUNCATE send_outbox, send_jobs")
+    conn.commit()
+    monkeypatch.setattr(smtp_pool.smtplib, "SMTP", FakeSMTP)
+    FakeSMTP.delivered = []
+    FakeSMTP.crash_after = None
+    yield conn
+    conn.close()
+
+
+def outbox_status(conn, job_id):
+    rows = conn.execute("SELECT email, status, tokens FROM send_outbox WHERE job_id = %s ORDER BY email",
+                        (job_id,)).fetchall()
+    conn.commit()
+    return {email: (status, tokens) for email, status, tokens in rows}
+
+
+def job_state(conn, job_id):
+    status = conn.execute("SELECT status FROM send_jobs WHERE id = %s", (job_id,)).fetchone()[0]
+    conn.commit()
+    return status
+
+
+def delivered_emails():
+    return [email for email, _ in FakeSMTP.delivered]
+
+
+def test_send_newsletter_goes_through_the_outbox(db):
+    sender = NewsletterSender()
+    articles = [Article(id=1, headline="Odds at 60%", subheader="Sub", blurb="Blurb", score=8, ticker="t1")]
+    tokens = {email: {"unsubscribe_url": f"https://example.com/u/{i}"} for i, email in enumerate(EMAILS)}
+
+    results = sender.send_newsletter(SMTP_CONFIG, EMAILS, articles, workers=2, recipient_tokens=tokens)
+
+    assert sorted(results["successful"]) == EMAILS and results["pending"] == 0
+    assert sorted(delivered_emails()) == EMAILS
+    job_id = db.execute("SELECT id FROM send_jobs").fetchone()[0]
+    assert job_state(db, job_id) == "done"
+    assert outbox_status(db, job_id) == {email: ("sent", tokens[email]) for email in EMAILS}
+
+
+def test_immediate_rerun_after_crash_waits_out_the_lease_and_finishes(db):
+    job_id = send_jobs.create_job("<p>Hello</p>", EMAILS, "Subject")
+
+    # Die part way through the second batch of 50, leaving it leased
+    FakeSMTP.crash_after = 60
+    with pytest.raises(Crash):
+        send_jobs.run_job(job_id, SMTP_CONFIG, workers=1, lease_seconds=2)
+    sent_before_crash = {email for email, (status, _) in outbox_status(db, job_id).items() if status == "sent"}
+    assert sent_before_crash == set(EMAILS[:50])
+
+    FakeSMTP.crash_after = None
+    FakeSMTP.delivered = []
+    start = time.monotonic()
+    results = send_jobs.run_job(job_id, SMTP_CONFIG, workers=1, lease_seconds=2)
+
+    assert time.monotonic() - start < 10
+    assert not sent_before_crash & set(delivered_emails())
+    assert sorted(delivered_emails()) == EMAILS[50:]
+    assert sorted(results["successful"]) == EMAILS[50:] and results["pending"] == 0
+    assert job_state(db, job_id) == "done"
+
+
+def test_rerun_without_waiting_reports_the_leased_recipients(db):
+    job_id = send_jobs.create_job("<p>Hello</p>", EMAILS, "Subject")
+    FakeSMTP.crash_after = 60
+    with pytest.raises(Crash):
+        send_jobs.run_job(job_id, SMTP_CONFIG, workers=1)
+
+    FakeSMTP.crash_after = None
+    results = send_jobs.run_job(job_id, SMTP_CONFIG, workers=1, wait_for_leases=False)
+    # 100-119 were never claimed and go out now; 50-99 are still leased by the dead run
+    assert results["successful"] == EMAILS[100:]
+    assert results["pending"] == 50
+    assert job_state(db, job_id) == "pending"
+
+
+def test_claims_skip_rows_locked_by_another_transaction(db):
+    job_id = send_jobs.create_job("<p>Hello</p>", EMAILS[:20], "Subject")
+    other = database.get_db_connection()
+    try:
+        locked = [row[0] for row in other.execute(
+            "SELECT email FROM send_outbox WHERE job_id = %s ORDER BY email LIMIT 5 FOR UPDATE", (job_id,))]
+        # Would block on the locked rows without SKIP LOCKED
+        db.execute("SET lock_timeout = '2s'")
+        db.commit()
+        batch = send_jobs.claim_batch(db, job_id, batch_size=10)
+        assert list(batch) == EMAILS[5:15]
+        assert not set(locked) & set(batch)
+    finally:
+        other.rollback()
+        other.close()
+
+    assert list(send_jobs.claim_batch(db, job_id, batch_size=10)) == EMAILS[:5] + EMAILS[15:20]
+    assert send_jobs.claim_batch(db, job_id, batch_size=10) == {}
+    assert send_jobs.leased_pending(db, job_id)[0] == 20
+
+
+def test_failed_sends_are_retried_until_max_attempts(db):
+    job_id = send_jobs.create_job("<p>Hello</p>", EMAILS[:2], "Subject")
+    failure = {"email": EMAILS[1], "error": "550 mailbox unavailable"}
+
+    assert list(send_jobs.claim_batch(db, job_id)) == EMAILS[:2]
+    send_jobs.record_results(db, job_id, {"successful": [EMAILS[0]], "failed": [failure]})
+    for attempt in range(2, send_jobs.MAX_ATTEMPTS + 1):
+        assert outbox_status(db, job_id)[EMAILS[1]][0] == "pending"
+        assert list(send_jobs.claim_batch(db, job_id)) == [EMAILS[1]]
+        send_jobs.record_results(db, job_id, {"successful": [], "failed": [failure]})
+
+    assert {email: status for email, (status, _) in outbox_status(db, job_id).items()} == \
+        {EMAILS[0]: "sent", EMAILS[1]: "failed"}
+    assert send_jobs.claim_batch(db, job_id) == {}
+    assert send_jobs.finish_job_if_done(db, job_id)
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from experimental.ann_index import IVFIndex
+from experimental.matching import ArticleMatcher
+
+
+def clustered_embeddings(n: int, dim: int, n_topics: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around topic centres, roughly like sentence embeddings of news."""
+    topics = rng.normal(size=(n_topics, dim))
+    vectors = topics[rng.integers(0, n_topics, n)] + 0.6 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray) -> float:
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx.tolist(), exact.tolist()))
+    return hits / exact.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and latency of the IVF article index vs the exact matcher")
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--lists", type=int, default=128)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    articles = clustered_embeddings(args.articles, args.dim, 200, rng)
+    queries = clustered_embeddings(args.queries, args.dim, 200, rng)
+
+    start = time.perf_counter()
+    exact = ArticleMatcher(articles).search(queries, args.k)
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = IVFIndex(n_lists=args.lists, seed=args.seed)
+    # Build incrementally, the way articles arrive day by day
+    for batch in np.array_split(articles, 10):
+        index.add(batch)
+    build_time = time.perf_counter() - start
+
+    print(f"{args.articles} articles, {args.queries} queries, dim {args.dim}, {args.lists} lists")
+    print(f"  exact matcher:  {exact_time * 1000:8.1f} ms  recall@{args.k} 1.000")
+    print(f"  index build:    {build_time * 1000:8.1f} ms")
+    for n_probe in (1, 2, 4, 8, 16, 32, args.lists):
+        start = time.perf_counter()
+        approx = index.search(queries, args.k, n_probe=n_probe)
+        elapsed = time.perf_counter() - start
+        print(f"  n_probe={n_probe:<4}    {elapsed * 1000:8.1f} ms  recall@{args.k} {recall_at_k(approx, exact):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.market_records import Event
+from agent.pm_market_getter import compute_interest_score
+from agent.scoring import compile_rules, score_markets
+from tools.synthetic_data import make_raw_events
+
+
+def inline_interest_score(market):
+    """The scoring logic as it was hard-coded in get_markets, kept as the baseline."""
+    options = market["options"]
+    if options:
+        avg_price_change = max(abs(option.get('oneDayPriceChange', 0)) for option in options)/len(options)
+    else:
+        avg_price_change = 0
+    if market["volume"] > 0:
+        base_score = (avg_price_change * market["volume24hr"] +
+                      (market["commentCount"]*100 * (market["volume24hr"] / market["volume"])))
+    else:
+        base_score = 0
+    interest_score = base_score * 2 if market["featured"] else base_score
+    if any(tag["id"] == 198 for tag in market["tags"]):
+        interest_score *= 100
+    if options:
+        probabilities = [option["probability"] for option in options]
+        has_100 = any(abs(p - 100) < 0.001 for p in probabilities)
+        all_zero = all(abs(p) < 0.001 for p in probabilities)
+        if has_100 or all_zero:
+            interest_score = 0
+    return interest_score
+
+
+def timed(fn, repeat: int):
+    """Best wall time of repeat calls, and the last call's result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inline, rule-table and vectorized interest scoring")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    markets = [Event.from_raw(event).to_dict() for event in make_raw_events(args.events, args.seed)]
+    rules = compile_rules()
+
+    # tests/test_scoring.py checks that all three produce identical scores
+    inline_time, _ = timed(lambda: [inline_interest_score(m) for m in markets], args.repeat)
+    rules_time, _ = timed(lambda: [compute_interest_score(m, rules) for m in markets], args.repeat)
+    batch_time, _ = timed(lambda: score_markets(markets, rules), args.repeat)
+
+    print(f"{args.events} events, best of {args.repeat}")
+    print(f"  inline logic:      {inline_time * 1000:8.1f} ms")
+    print(f"  compiled rules:    {rules_time * 1000:8.1f} ms  ({inline_time / rules_time:.2f}x)")
+    print(f"  vectorized rules:  {batch_time * 1000:8.1f} ms  ({inline_time / batch_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
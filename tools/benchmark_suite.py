@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.market_records import Event
+from agent.market_selection import interest_key, select_top_markets
+from agent.scoring import compile_rules, score_events
+from experimental.article_dedup import dedupe_articles
+from experimental.batch_encoding import encode_texts
+from experimental.matching import top_k_matches
+from tools.benchmark_scoring import timed
+from tools.synthetic_data import make_articles, make_raw_events
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT_DIR = os.path.join(REPO_ROOT, ".cache", "benchmarks")
+
+
+class HashingEncoder:
+    """
+    Offline stand-in for a SentenceTransformer: signed feature hashing of words.
+
+    Same encode() signature, deterministic, and needs no model download, so the
+    matching numbers only depend on the code under test.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                h = zlib.crc32(word.encode("utf-8"))
+                embeddings[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return embeddings
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_size(n_events: int, args) -> dict:
+    """Time every stage for one synthetic dataset size; returns {stage: seconds}."""
+    raw_events = make_raw_events(n_events, args.seed)
+    articles = make_articles(max(n_events // 10, args.k), args.seed)
+    rules = compile_rules()
+    encoder = HashingEncoder(args.dim)
+    stages = {}
+
+    stages["parse"], records = timed(lambda: [Event.from_raw(event) for event in raw_events], args.repeat)
+    stages["score"], _ = timed(lambda: score_events(records, rules), args.repeat)
+    stages["serialize"], markets = timed(lambda: [record.to_dict() for record in records], args.repeat)
+    stages["top_k_sorted"], _ = timed(lambda: sorted(markets, key=interest_key, reverse=True)[:args.top], args.repeat)
+    # Day windows of 100 records, the shape get_top_markets_for_date_range streams
+    windows = [records[i:i + 100] for i in range(0, len(records), 100)]
+    stages["top_k_select"], _ = timed(lambda: select_top_markets(windows, args.top), args.repeat)
+    stages["dedupe_articles"], _ = timed(lambda: dedupe_articles(articles), args.repeat)
+
+    queries = markets[:args.match_markets]
+    market_texts = [f"{m['title']} {m['description']}" for m in queries]
+    article_texts = [f"{a['title']} {a['description']}" for a in articles]
+    stages["encode_stub"], (market_embeddings, article_embeddings) = timed(
+        lambda: (encode_texts(market_texts, encoder, verbose=False), encode_texts(article_texts, encoder, verbose=False)),
+        args.repeat
+    )
+    for precision in args.precisions:
+        stages[f"match_{precision}"], _ = timed(
+            lambda: top_k_matches(market_embeddings, article_embeddings, k=args.k, precision=precision), args.repeat
+        )
+    return {"events": n_events, "articles": len(articles), "queries": len(queries), "seconds": stages}
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path, "r") as f:
+        baseline = {run["events"]: run["seconds"] for run in json.load(f)["runs"]}
+    print(f"\nCompared with {baseline_path} (ratio > 1 means slower now)")
+    for run in results["runs"]:
+        previous = baseline.get(run["events"])
+        if previous is None:
+            continue
+        for stage, seconds in run["seconds"].items():
+            if stage in previous and previous[stage] > 0:
+                print(f"  {run['events']:>7} {stage:18} {seconds / previous[stage]:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline CPU benchmarks for parsing, scoring, top-k and matching")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated event counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=20, help="Markets kept by the top-k stage")
+    parser.add_argument("--k", type=int, default=5, help="Articles matched per market")
+    parser.add_argument("--match-markets", type=int, default=1000, help="Markets embedded and matched per size")
+    parser.add_argument("--dim", type=int, default=384, help="Stub embedding size")
+    parser.add_argument("--precisions", default="float32,float16,int8")
+    parser.add_argument("--output", help="Results JSON (default .cache/benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+    args.precisions = args.precisions.split(",")
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "runs": [],
+    }
+    for n_events in (int(size) for size in args.sizes.split(",")):
+        run = run_size(n_events, args)
+        results["runs"].append(run)
+        print(f"{n_events} events, {run['articles']} articles, best of {args.repeat}")
+        for stage, seconds in run["seconds"].items():
+            print(f"  {stage:18} {seconds * 1000:10.2f} ms")
+
+    output = args.output
+    if not output:
+        os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+        output = os.path.join(DEFAULT_OUTPUT_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that belong to the matching stage only
+ML_STACK = ("sentence_transformers", "sklearn", "torch", "transformers", "scipy")
+
+# Light entry points: fetching, scoring and the mapper before matching runs
+LIGHT_MODULES = [
+    "agent.pm_market_getter",
+    "agent.event_store",
+    "experimental.market_news_mapper",
+    "tools.news_article_getter",
+]
+
+
+def measure_import(module: str):
+    """
+    Import module in a fresh interpreter under -X importtime.
+
+    Returns the total import time in milliseconds and the set of top-level packages imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    packages = set()
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        name = name.strip()
+        packages.add(name.split(".")[0])
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if the light import paths pull in the ML stack or exceed a time budget")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Max cumulative import time per module")
+    parser.add_argument("modules", nargs="*", default=LIGHT_MODULES)
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        try:
+            elapsed_ms, packages = measure_import(module)
+        except RuntimeError as e:
+            failures.append(str(e))
+            continue
+        heavy = sorted(packages.intersection(ML_STACK))
+        status = "ok"
+        if heavy:
+            status = "FAIL"
+            failures.append(f"{module} imports {', '.join(heavy)}")
+        if elapsed_ms > args.budget_ms:
+            status = "FAIL"
+            failures.append(f"{module} took {elapsed_ms:.0f} ms to import (budget {args.budget_ms:.0f} ms)")
+        print(f"{status:4}  {module:40} {elapsed_ms:8.1f} ms")
+
+    if failures:
+        print("\nImport budget check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
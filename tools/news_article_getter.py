@@ -7,7 +7,6 @@ load_dotenv()
 
 # Get the API key from environment variables
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
-print(NEWS_API_KEY)
 NEWS_API_URL = "https://newsapi.org/v2/top-headlines"
 
 def test_news_api():
@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from experimental.matching import ArticleMatcher
+from experimental.quantization import PRECISIONS
+from tools.benchmark_ann import clustered_embeddings, recall_at_k
+
+
+def load_embeddings(args, rng):
+    """Article and market embeddings from .npy files, or clustered synthetic ones."""
+    if args.articles_npy and args.markets_npy:
+        return np.load(args.articles_npy), np.load(args.markets_npy)
+    articles = clustered_embeddings(args.articles, args.dim, 200, rng)
+    markets = clustered_embeddings(args.markets, args.dim, 200, rng)
+    return articles, markets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="How much float16 / int8 embeddings change the top-k article assignments")
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--markets", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--articles-npy", help="Real article embeddings saved with np.save")
+    parser.add_argument("--markets-npy", help="Real market embeddings saved with np.save")
+    args = parser.parse_args()
+
+    articles, markets = load_embeddings(args, np.random.default_rng(args.seed))
+    print(f"{len(articles)} articles, {len(markets)} markets, dim {articles.shape[1]}, top {args.k}")
+    print(f"  {'precision':9}  {'memory':>9}  {'search':>9}  {'recall':>7}  {'same list':>9}  {'same top 1':>10}")
+
+    reference = None
+    for precision in PRECISIONS:
+        matcher = ArticleMatcher(articles.astype(np.float32), precision=precision)
+        nbytes = matcher.quantized.nbytes if matcher.quantized is not None else matcher.article_matrix.nbytes
+        start = time.perf_counter()
+        top = matcher.search(markets, args.k)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = top
+        same_list = np.mean((top == reference).all(axis=1))
+        same_first = np.mean(top[:, 0] == reference[:, 0])
+        print(f"  {precision:9}  {nbytes / 2 ** 20:7.1f}MB  {elapsed * 1000:7.1f}ms  "
+              f"{recall_at_k(top, reference):7.3f}  {same_list:9.3f}  {same_first:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+import random
+from typing import List, Dict, Any
+
+TAGS = [(198, "Breaking News"), (2, "Politics"), (21, "Crypto"), (100639, "Elections"),
+        (107, "Business"), (1, "Sports"), (235, "Bitcoin"), (74, "Geopolitics")]
+
+WORDS = ("election senate bitcoin price rate cut fed inflation war ceasefire court ruling "
+         "nominee trump harris tariff china ukraine russia israel market stock earnings "
+         "apple nvidia openai launch vote poll governor mayor storm hurricane record").split()
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def make_raw_event(rng: random.Random, i: int) -> Dict[str, Any]:
+    """One Gamma /events payload entry, shaped like what the API returns."""
+    markets = []
+    for _ in range(rng.choice([1, 1, 1, 2, 3, 5, 8])):
+        price = rng.choice([rng.random(), rng.random(), 1.0, 0.0])
+        markets.append({
+            "outcomePrices": json.dumps([str(price), str(1 - price)]),
+            "outcomes": '["Yes", "No"]',
+            "groupItemTitle": rng.choice(["", "", _sentence(rng, 1, 3)]),
+            "lastTradePrice": round(rng.random(), 3),
+            "oneDayPriceChange": round(rng.uniform(-0.2, 0.2), 4),
+        })
+    return {
+        "title": _sentence(rng, 4, 12) + "?",
+        "ticker": f"synthetic-event-{i}",
+        "description": _sentence(rng, 20, 160),
+        "endDate": "2025-12-31T12:00:00Z",
+        "startDate": "2025-01-01T12:00:00Z",
+        "updatedAt": f"2025-01-{1 + i % 28:02d}T00:00:00Z",
+        "volume": str(rng.choice([0, rng.random() * 1e6, rng.random() * 1e4])),
+        "volume24hr": rng.random() * 1e5,
+        "commentCount": rng.randint(0, 500),
+        "featured": rng.random() < 0.05,
+        "tags": [{"id": str(tag_id), "label": label} for tag_id, label in rng.sample(TAGS, rng.randint(0, 3))],
+        "markets": markets,
+    }
+
+
+def make_raw_events(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [make_raw_event(rng, i) for i in range(n)]
+
+
+def make_articles(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """NewsAPI-shaped articles."""
+    rng = random.Random(seed)
+    return [{
+        "title": _sentence(rng, 5, 14),
+        "description": _sentence(rng, 10, 40),
+        "url": f"https://news.example.com/{i}",
+        "source": {"name": rng.choice(["Wire", "Daily", "Herald"])},
+    } for i in range(n)]